@@ -61,13 +61,23 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'core.middleware.BatchLoaderMiddleware',
 ]
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
 
         'rest_framework_simplejwt.authentication.JWTAuthentication',
-    )
+    ),
+    'DEFAULT_RENDERER_CLASSES': (
+        'core.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        'core.parsers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ),
 }
 
 ROOT_URLCONF = 'cardetailing.urls'
@@ -165,5 +175,62 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 MEDIA_URL = '/media/'
+DEFAULT_FILE_STORAGE = 'core.storage.ContentHashedStorage'
+
+# Service image uploads: size limit, longest side of the WebP display copy and of the thumbnails, encoder quality
+SERVICE_IMAGE_MAX_BYTES = int(os.environ.get("SERVICE_IMAGE_MAX_BYTES", 15 * 1024 * 1024))
+SERVICE_IMAGE_MAX_SIZE = int(os.environ.get("SERVICE_IMAGE_MAX_SIZE", 1600))
+SERVICE_THUMBNAIL_SIZE = int(os.environ.get("SERVICE_THUMBNAIL_SIZE", 480))
+SERVICE_IMAGE_QUALITY = int(os.environ.get("SERVICE_IMAGE_QUALITY", 80))
 
 SITE_ID = '4d421623b0207acdc500001d'
+
+# Per-service, per-day availability cache (entries, seconds). Bookings and service edits only clear it in
+# the worker that handled them, so other workers may offer a taken slot (booking it fails with 400) or miss
+# a new one for up to the TTL; a longer TTL saves more slot queries at the cost of that window
+AVAILABILITY_CACHE_SIZE = int(os.environ.get("AVAILABILITY_CACHE_SIZE", 20000))
+AVAILABILITY_CACHE_TTL = int(os.environ.get("AVAILABILITY_CACHE_TTL", 30))
+
+# Per-detailer index of service ids and metadata (detailers, seconds); the TTL only bounds memory held
+# for idle detailers
+SERVICE_INDEX_CACHE_SIZE = int(os.environ.get("SERVICE_INDEX_CACHE_SIZE", 5000))
+SERVICE_INDEX_CACHE_TTL = int(os.environ.get("SERVICE_INDEX_CACHE_TTL", 600))
+# How often (seconds) a worker re-reads a detailer's version counter shared through MongoDB. The worker
+# that saved a service sees it at once; other workers may serve the old services for up to this long
+SERVICE_INDEX_VERSION_CHECK_INTERVAL = int(os.environ.get("SERVICE_INDEX_VERSION_CHECK_INTERVAL", 5))
+
+# Upper bound on the bookings accepted by one services/schedule/bulk request
+BULK_BOOKING_MAX_ITEMS = int(os.environ.get("BULK_BOOKING_MAX_ITEMS", 1000))
+
+# Cursor pagination of the public service catalog
+SERVICE_CATALOG_PAGE_SIZE = int(os.environ.get("SERVICE_CATALOG_PAGE_SIZE", 50))
+SERVICE_CATALOG_MAX_PAGE_SIZE = int(os.environ.get("SERVICE_CATALOG_MAX_PAGE_SIZE", 200))
+
+# Keyset pagination of the detailer order list
+ORDERS_PAGE_SIZE = int(os.environ.get("ORDERS_PAGE_SIZE", 50))
+ORDERS_MAX_PAGE_SIZE = int(os.environ.get("ORDERS_MAX_PAGE_SIZE", 200))
+
+# Page size of the detailer client directory
+CLIENTS_PAGE_SIZE = int(os.environ.get("CLIENTS_PAGE_SIZE", 50))
+CLIENTS_MAX_PAGE_SIZE = int(os.environ.get("CLIENTS_MAX_PAGE_SIZE", 200))
+
+# Seconds between reloads of the Role / SubmitStatus registries
+REFERENCE_DATA_TTL = int(os.environ.get("REFERENCE_DATA_TTL", 600))
+
+# Seconds between flushes of buffered CarService view counts
+VIEW_COUNT_FLUSH_INTERVAL = int(os.environ.get("VIEW_COUNT_FLUSH_INTERVAL", 30))
+
+INVOICE_TEMPLATE_PATH = os.environ.get("INVOICE_TEMPLATE_PATH", os.path.join(BASE_DIR, 'invoice_template.html'))
+
+# On-disk cache of rendered invoice PDFs
+INVOICE_PDF_CACHE_DIR = os.environ.get("INVOICE_PDF_CACHE_DIR", os.path.join(BASE_DIR, 'cache', 'invoices'))
+INVOICE_PDF_CACHE_MAX_BYTES = int(os.environ.get("INVOICE_PDF_CACHE_MAX_BYTES", 512 * 1024 * 1024))
+
+# Bounded wkhtmltopdf worker pool (workers, waiting jobs, remembered jobs, seconds a download waits)
+INVOICE_RENDER_WORKERS = int(os.environ.get("INVOICE_RENDER_WORKERS", 2))
+INVOICE_RENDER_MAX_QUEUE = int(os.environ.get("INVOICE_RENDER_MAX_QUEUE", 50))
+INVOICE_RENDER_MAX_JOBS = int(os.environ.get("INVOICE_RENDER_MAX_JOBS", 1000))
+INVOICE_RENDER_TIMEOUT = int(os.environ.get("INVOICE_RENDER_TIMEOUT", 60))
+
+# Invoices rendered ahead while streaming a ZIP export
+INVOICE_EXPORT_PARALLELISM = int(os.environ.get("INVOICE_EXPORT_PARALLELISM", 4))
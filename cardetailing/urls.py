@@ -16,13 +16,13 @@ Including another URLconf
 """
 from django.conf import settings
 from django.contrib import admin
-from django.conf.urls.static import static
 
 from django.urls import path, include
 
+from core.views_media import serve_media
+
 urlpatterns = [
     path('admin/', admin.site.urls),
-    path("api/", include("core.urls"))
+    path("api/", include("core.urls")),
+    path(settings.MEDIA_URL.lstrip("/") + "<path:path>", serve_media),
 ]
-
-urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
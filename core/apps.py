@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
+
+    def ready(self):
+        from core.services import reference_data  # noqa: F401 - connects registry invalidation signals
+        from core.services import service_index  # noqa: F401 - connects service index invalidation signals
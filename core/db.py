@@ -0,0 +1,11 @@
+from django.db import connection
+
+
+def get_database():
+    # djongo keeps the pymongo Database object as the raw DB-API connection
+    connection.ensure_connection()
+    return connection.connection
+
+
+def get_collection(model_class):
+    return get_database()[model_class._meta.db_table]
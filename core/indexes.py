@@ -0,0 +1,197 @@
+import logging
+from datetime import datetime
+
+from bson import ObjectId
+from pymongo import ASCENDING, IndexModel
+from pymongo.errors import OperationFailure
+from rest_framework import status
+
+from core.db import get_database
+from core.exceptions import ServiceException
+from core.models import CarServiceScheduleSubmit, CarServiceSchedule, CarService, Car, Employee, Invoice, Role, \
+    SubmitStatus
+from core.services.analytics_rollup import ROLLUP_COLLECTION
+
+logger = logging.getLogger(__name__)
+
+# only indexes with this prefix are managed (and dropped when stale), djongo's own indexes are left alone
+INDEX_PREFIX = "core_idx_"
+
+SUBMITS = CarServiceScheduleSubmit._meta.db_table
+SCHEDULES = CarServiceSchedule._meta.db_table
+SERVICES = CarService._meta.db_table
+CARS = Car._meta.db_table
+EMPLOYEES = Employee._meta.db_table
+INVOICES = Invoice._meta.db_table
+ROLES = Role._meta.db_table
+STATUSES = SubmitStatus._meta.db_table
+
+
+def _index(name: str, *fields: str, unique: bool = False) -> IndexModel:
+    return IndexModel([(field, ASCENDING) for field in fields], name=INDEX_PREFIX + name, unique=unique)
+
+
+INDEX_SPEC = {
+    SUBMITS: [
+        # enforces Meta.unique_together, which djongo does not turn into an index
+        _index("submit_schedule_date", "schedule_id", "date", unique=True),
+        _index("submit_service_date", "service_id", "date"),
+        _index("submit_user_date", "user_id", "date"),
+        _index("submit_car_date", "car_id", "date"),
+        _index("submit_date", "date"),
+    ],
+    SCHEDULES: [
+        _index("schedule_service_day", "service_id", "day_of_week"),
+        _index("schedule_service_time", "service_id", "time"),
+    ],
+    SERVICES: [
+        _index("service_detailer", "detailer_id"),
+    ],
+    CARS: [
+        _index("car_user_removed", "user_id", "is_removed"),
+    ],
+    EMPLOYEES: [
+        _index("employee_detailer_removed", "detailer_id", "is_removed"),
+    ],
+    INVOICES: [
+        _index("invoice_detailer_number", "detailer_id", "number"),
+        _index("invoice_detailer_created", "detailer_id", "date_created"),
+    ],
+    ROLES: [
+        _index("role_name", "name"),
+    ],
+    STATUSES: [
+        _index("status_name", "name"),
+    ],
+    ROLLUP_COLLECTION: [
+        _index("rollup_detailer_day", "detailer_id", "day", unique=True),
+    ],
+}
+
+_ID = ObjectId()
+_ID_STR = str(_ID)
+_NOW = datetime(2024, 1, 1)
+
+# the query shapes CarServiceManager and its helpers send, with representative values
+QUERY_SHAPES = [
+    ("availability: weekly template", SCHEDULES, {"service_id": {"$in": [_ID_STR]}}, None),
+    ("availability: taken slots", SUBMITS, {"date": {"$gte": _NOW, "$lt": _NOW}, "schedule_id": {"$in": [_ID_STR]}},
+     None),
+    ("slot search: taken slots", SUBMITS, {"date": {"$gte": _NOW, "$lt": _NOW}}, None),
+    ("booking: schedule by time", SCHEDULES,
+     {"service_id": _ID_STR, "day_of_week": 1, "time": datetime(1900, 1, 1, 10)}, None),
+    ("user submits", SUBMITS, {"user_id": "1", "date": {"$gt": _NOW}}, None),
+    ("remove car: pending submits", SUBMITS, {"car_id": _ID_STR, "date": {"$gt": _NOW}}, None),
+    ("detailer services", SERVICES, {"detailer_id": "1"}, None),
+    ("orders page", SUBMITS, {"service_id": {"$in": [_ID_STR]}, "date": {"$gte": _NOW}},
+     [("date", ASCENDING), ("_id", ASCENDING)]),
+    ("client directory", SUBMITS, {"service_id": {"$in": [_ID_STR]}}, None),
+    ("client submits", SUBMITS, {"service_id": {"$in": [_ID_STR]}, "user_id": "1"}, None),
+    ("cars of user", CARS, {"user_id": "1", "is_removed": 0}, None),
+    ("employees of detailer", EMPLOYEES, {"detailer_id": "1", "is_removed": 0}, None),
+    ("invoices of detailer", INVOICES, {"detailer_id": "1", "date_created": {"$gte": _NOW, "$lt": _NOW}},
+     [("date_created", ASCENDING)]),
+    ("next invoice number", INVOICES, {"detailer_id": "1", "number": {"$gt": 0}}, None),
+    ("analytics rollups", ROLLUP_COLLECTION, {"detailer_id": "1", "day": {"$gte": "2024-01-01", "$lte": "2024-12-31"}},
+     [("day", ASCENDING)]),
+]
+
+
+def sync_collection_indexes(collection_name: str, drop_stale: bool = True, dry_run: bool = False) -> list[str]:
+    collection = get_database()[collection_name]
+    existing = collection.index_information()
+    existing_keys = {tuple(tuple(key) for key in info["key"]): (name, info.get("unique", False))
+                     for name, info in existing.items()}
+    actions = []
+
+    for index in INDEX_SPEC.get(collection_name, []):
+        document = index.document
+        name = document["name"]
+        keys = tuple((field, direction) for field, direction in document["key"].items())
+        unique = document.get("unique", False)
+
+        current = existing.get(name)
+        if current is not None:
+            if tuple(tuple(key) for key in current["key"]) == keys and current.get("unique", False) == unique:
+                continue
+            actions.append(f"{collection_name}: drop changed index {name}")
+            if not dry_run:
+                collection.drop_index(name)
+        elif keys in existing_keys:
+            other_name, other_unique = existing_keys[keys]
+            if other_unique == unique:
+                actions.append(f"{collection_name}: {name} already covered by {other_name}, skipped")
+            else:
+                # MongoDB refuses two indexes on the same keys with different options
+                actions.append(f"{collection_name}: FAILED to create {name}: index {other_name} has the same keys "
+                               f"but unique={other_unique}, drop it and run again")
+            continue
+
+        actions.append(f"{collection_name}: create index {name} {list(keys)}{' unique' if unique else ''}")
+        if not dry_run:
+            try:
+                collection.create_indexes([index])
+            except OperationFailure as e:
+                actions.append(f"{collection_name}: FAILED to create {name}: {e}")
+                if unique and e.code == 11000:
+                    actions.extend(f"{collection_name}: duplicate {group}"
+                                   for group in _duplicate_groups(collection, [field for field, _ in keys]))
+
+    if drop_stale:
+        wanted = {index.document["name"] for index in INDEX_SPEC.get(collection_name, [])}
+        for name in existing:
+            if name.startswith(INDEX_PREFIX) and name not in wanted:
+                actions.append(f"{collection_name}: drop stale index {name}")
+                if not dry_run:
+                    collection.drop_index(name)
+    return actions
+
+
+_verified_unique = set()
+
+
+def require_unique_index(collection_name: str, *fields: str) -> None:
+    """Fails unless a unique index on exactly these fields exists; a positive answer is remembered per process."""
+    keys = tuple(fields)
+    if (collection_name, keys) in _verified_unique:
+        return
+    for info in get_database()[collection_name].index_information().values():
+        if info.get("unique") and tuple(field for field, _ in info["key"]) == keys:
+            _verified_unique.add((collection_name, keys))
+            return
+    logger.error("Unique index on %s %s is missing, run manage.py sync_indexes", collection_name, list(keys))
+    raise ServiceException(message="Booking is unavailable, database indexes are not set up",
+                           status_code=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+def _duplicate_groups(collection, fields: list[str], limit: int = 50) -> list[str]:
+    rows = collection.aggregate([
+        {"$group": {"_id": {field: f"${field}" for field in fields}, "count": {"$sum": 1}, "ids": {"$push": "$_id"}}},
+        {"$match": {"count": {"$gt": 1}}},
+        {"$limit": limit}
+    ], allowDiskUse=True)
+    return [", ".join(f"{field}={row['_id'].get(field)}" for field in fields) +
+            f" ({row['count']} documents: {', '.join(str(i) for i in row['ids'])})" for row in rows]
+
+
+def _plan_stages(plan: dict):
+    yield plan.get("stage")
+    if "inputStage" in plan:
+        yield from _plan_stages(plan["inputStage"])
+    for child in plan.get("inputStages", []):
+        yield from _plan_stages(child)
+
+
+def find_collection_scans() -> list[tuple[str, str]]:
+    database = get_database()
+    scans = []
+    for label, collection_name, query, sort in QUERY_SHAPES:
+        command = {"find": collection_name, "filter": query}
+        if sort:
+            command["sort"] = dict(sort)
+        explain = database.command("explain", command, verbosity="queryPlanner")
+        winning_plan = explain["queryPlanner"]["winningPlan"]
+        stages = list(_plan_stages(winning_plan.get("queryPlan", winning_plan)))
+        if "COLLSCAN" in stages:
+            scans.append((label, " -> ".join(stage for stage in stages if stage)))
+    return scans
@@ -0,0 +1,78 @@
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.db import get_collection
+from core.exceptions import ServiceException
+from core.models import CarServiceScheduleSubmit
+from core.services.car_service import CarServiceManager
+
+
+class Command(BaseCommand):
+    help = "Fires parallel bookings at a few free slots of a service and checks that none is booked twice"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--service-id", required=True)
+        parser.add_argument("--user-id", required=True)
+        parser.add_argument("--car-id", required=True)
+        parser.add_argument("--slots", type=int, default=3)
+        parser.add_argument("--requests", type=int, default=300)
+        parser.add_argument("--workers", type=int, default=32)
+        parser.add_argument("--keep", action="store_true", help="Keep the bookings made by the benchmark")
+
+    def handle(self, *args, **options):
+        manager = CarServiceManager()
+        service_id = options["service_id"]
+        user_id = options["user_id"]
+        car_id = options["car_id"]
+
+        submits = get_collection(CarServiceScheduleSubmit)
+        if not any(index.get("unique") and [field for field, _ in index["key"]] == ["schedule_id", "date"]
+                   for index in submits.index_information().values()):
+            raise CommandError("Unique (schedule_id, date) index is missing, run sync_indexes first")
+
+        day_from = date.today() + timedelta(days=1)
+        free = manager.get_available_schedules(service_id, day_from.isoformat(),
+                                               (day_from + timedelta(days=30)).isoformat())
+        targets = [slot["start"] for slot in free[:options["slots"]]]
+        if not targets:
+            raise CommandError("Service has no free slots in the next 30 days")
+
+        def book(index: int) -> str:
+            try:
+                manager.submit_schedule(service_id, targets[index % len(targets)], user_id, car_id)
+                return "booked"
+            except ServiceException as e:
+                return f"rejected {e.status_code}"
+            except Exception as e:
+                return f"error {type(e).__name__}"
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options["workers"]) as executor:
+            outcomes = Counter(executor.map(book, range(options["requests"])))
+        elapsed = time.perf_counter() - started
+
+        booked = list(submits.find({"service_id": service_id, "user_id": str(user_id),
+                                    "date": {"$in": [datetime.fromisoformat(start) for start in targets]}},
+                                   {"schedule_id": 1, "date": 1}))
+        per_slot = Counter((submit["schedule_id"], submit["date"]) for submit in booked)
+        double_booked = sum(1 for count in per_slot.values() if count > 1)
+
+        for outcome, count in sorted(outcomes.items()):
+            self.stdout.write(f"{outcome:<16} {count:>6}")
+        self.stdout.write(f"{'slots':<16} {len(targets):>6}")
+        self.stdout.write(f"{'throughput':<16} {options['requests'] / elapsed:>6.0f} req/s "
+                          f"({elapsed * 1000 / options['requests']:.2f} ms per request)")
+
+        if not options["keep"]:
+            for submit in booked:
+                manager.remove_submit(user_id, str(submit["_id"]))
+
+        if double_booked or outcomes["booked"] != len(targets):
+            raise CommandError(f"{double_booked} slots double booked, {outcomes['booked']} bookings "
+                               f"for {len(targets)} slots")
+        self.stdout.write(self.style.SUCCESS("No double bookings"))
+
@@ -0,0 +1,58 @@
+import timeit
+from datetime import datetime
+from types import SimpleNamespace
+
+from django.core.management.base import BaseCommand
+
+from core.services.invoice_template import invoice_template, SERVICE_ROW, VAT_RATE
+
+
+def legacy_render(invoice, detailer, template_path):
+    html_content = open(template_path, encoding="utf-8").read()
+    services_html = ""
+    for i, service in enumerate(invoice.services):
+        services_html += SERVICE_ROW.format(index=i + 1, name=service["name"], price=service["price"],
+                                            vat=service["price"] * VAT_RATE,
+                                            netto=service["price"] * (1 - VAT_RATE))
+    invoice_data = {
+        "invoice_number": f"FV/{invoice.date_created.strftime('%Y')}/{invoice.number:04}",
+        "invoice_date": invoice.date_created.strftime("%Y-%m-%d"),
+        "detailer_name": detailer.company_name,
+        "detailer_address": detailer.street + " " + detailer.city + " " + detailer.zip_code,
+        "detailer_nip": detailer.nip,
+        "client_name": invoice.first_name + " " + invoice.last_name,
+        "client_address": invoice.street + " " + invoice.zip_code,
+        "client_nip": invoice.nip,
+        "services": services_html,
+        "total_netto": invoice.amount_brutto * (1 - VAT_RATE),
+        "total_vat": invoice.amount_brutto * VAT_RATE,
+        "total_brutto": invoice.amount_brutto,
+    }
+    for key, value in invoice_data.items():
+        html_content = html_content.replace("{{" + key + "}}", str(value))
+    return html_content
+
+
+class Command(BaseCommand):
+    help = "Compares the precompiled invoice template against the legacy str.replace renderer"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", default="1,10,50,100,250,500")
+        parser.add_argument("--repeat", type=int, default=200)
+
+    def handle(self, *args, **options):
+        detailer = SimpleNamespace(company_name="Detailing & Co", street="Prosta 1", city="Warszawa",
+                                   zip_code="00-001", nip="1234567890")
+
+        self.stdout.write(f"{'items':>6} {'legacy ms':>10} {'compiled ms':>12} {'speedup':>8}")
+        for size in [int(s) for s in options["sizes"].split(",")]:
+            services = [{"name": f"Mycie <premium> #{i}", "price": 99.99 + i} for i in range(size)]
+            invoice = SimpleNamespace(services=services, number=7, date_created=datetime(2024, 12, 31),
+                                      first_name="Jan", last_name="Kowalski", street="Polna 2", zip_code="00-002",
+                                      nip=None, amount_brutto=sum(s["price"] for s in services))
+
+            repeat = options["repeat"]
+            legacy = timeit.timeit(lambda: legacy_render(invoice, detailer, invoice_template.path), number=repeat)
+            compiled = timeit.timeit(lambda: invoice_template.render(invoice, detailer), number=repeat)
+            self.stdout.write(f"{size:>6} {legacy / repeat * 1000:>10.3f} {compiled / repeat * 1000:>12.3f} "
+                              f"{legacy / compiled:>7.1f}x")
@@ -0,0 +1,49 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory
+from rest_framework.renderers import JSONRenderer
+
+from core.renderers import ORJSONRenderer
+from core.repositories import read_repository
+from core.serializers import serialize_catalog_row
+from core.services.car_service import CarServiceManager
+
+
+def render_ms(renderer, data, repeat: int) -> float:
+    renderer.render(data)
+    started = time.perf_counter()
+    for _ in range(repeat):
+        renderer.render(data)
+    return (time.perf_counter() - started) / repeat * 1000
+
+
+class Command(BaseCommand):
+    help = "Compares DRF's stdlib JSONRenderer with the orjson renderer on the orders and catalog payloads"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--detailer-id", required=True)
+        parser.add_argument("--limit", type=int, default=200)
+        parser.add_argument("--repeat", type=int, default=200)
+
+    def handle(self, *args, **options):
+        orders = CarServiceManager().get_all_orders(options["detailer_id"], {"limit": str(options["limit"])})
+        orders["results"] = list(orders["results"])
+
+        request = RequestFactory().get("/services", HTTP_HOST="localhost")
+        rows = read_repository.services_page(None, False, options["limit"])
+        detailers = read_repository.users_by_ids({row.get("detailer_id") for row in rows}, ("id", "username"))
+        catalog = {"next": None, "previous": None,
+                   "results": [serialize_catalog_row(row, detailers, request) for row in rows]}
+
+        stdlib, fast = JSONRenderer(), ORJSONRenderer()
+        repeat = options["repeat"]
+        self.stdout.write(f"{'payload':<9} {'items':>6} {'bytes':>8} {'json ms':>8} {'orjson ms':>10} {'speedup':>8} "
+                          f"identical")
+        for name, data in (("orders", orders), ("catalog", catalog)):
+            slow_ms = render_ms(stdlib, data, repeat)
+            fast_ms = render_ms(fast, data, repeat)
+            content = stdlib.render(data)
+            self.stdout.write(f"{name:<9} {len(data['results']):>6} {len(content):>8} {slow_ms:>8.3f} "
+                              f"{fast_ms:>10.3f} {slow_ms / fast_ms if fast_ms else 0:>7.1f}x "
+                              f"{content == fast.render(data)}")
@@ -0,0 +1,89 @@
+import time
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.models import CarService, CarServiceSchedule, CarServiceScheduleSubmit, Car, AppUser
+from core.repositories import read_repository
+from core.services.availability_cache import availability_cache
+from core.services.car_service import CarServiceManager
+
+
+def cpu_ms(func, repeat: int) -> float:
+    func()
+    started = time.process_time()
+    for _ in range(repeat):
+        func()
+    return (time.process_time() - started) / repeat * 1000
+
+
+class Command(BaseCommand):
+    help = "Measures per-request CPU of the hot read paths through the djongo ORM and through the pymongo repository"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--service-id", required=True)
+        parser.add_argument("--user-id", required=True)
+        parser.add_argument("--detailer-id", required=True)
+        parser.add_argument("--repeat", type=int, default=50)
+
+    def handle(self, *args, **options):
+        manager = CarServiceManager()
+        service_id = options["service_id"]
+        user_id = options["user_id"]
+        detailer_id = options["detailer_id"]
+        if not CarService.objects.filter(_id=ObjectId(service_id)).exists():
+            raise CommandError("Service not found")
+
+        day_from = datetime.now()
+        day_to = day_from + timedelta(days=30)
+        service_ids = [str(s._id) for s in CarService.objects.filter(detailer_id=detailer_id)]
+        page_size = settings.SERVICE_CATALOG_PAGE_SIZE
+
+        def orm_availability():
+            service = CarService.objects.filter(_id=ObjectId(service_id)).first()
+            schedules = list(CarServiceSchedule.objects.filter(service_id=str(service._id)))
+            list(CarServiceScheduleSubmit.objects.filter(schedule_id__in=[str(s._id) for s in schedules],
+                                                         date__gte=day_from, date__lt=day_to))
+
+        def repo_availability():
+            availability_cache.invalidate_service(service_id)
+            manager.get_available_schedules(service_id, day_from.date().isoformat(), day_to.date().isoformat())
+
+        def orm_user_submits():
+            submits = list(CarServiceScheduleSubmit.objects.filter(user_id=user_id, date__gt=datetime.now()))
+            list(CarService.objects.filter(_id__in=[ObjectId(s.service_id) for s in submits]))
+            list(Car.objects.filter(_id__in=[ObjectId(s.car_id) for s in submits]))
+
+        def orm_orders():
+            submits = list(CarServiceScheduleSubmit.objects.filter(service_id__in=service_ids).order_by("date")[:50])
+            list(AppUser.objects.filter(id__in=[int(s.user_id) for s in submits]))
+            list(Car.objects.filter(_id__in=[ObjectId(s.car_id) for s in submits]))
+
+        def orm_clients():
+            submits = list(CarServiceScheduleSubmit.objects.filter(service_id__in=service_ids))
+            list(AppUser.objects.filter(id__in={int(s.user_id) for s in submits}))
+
+        def orm_catalog():
+            services = list(CarService.objects.order_by("_id")[:page_size])
+            list(AppUser.objects.filter(id__in={int(s.detailer_id) for s in services}))
+
+        def repo_catalog():
+            rows = read_repository.services_page(None, False, page_size + 1)
+            read_repository.users_by_ids({row.get("detailer_id") for row in rows}, ("id", "username"))
+
+        cases = [
+            ("availability", orm_availability, repo_availability),
+            ("user submits", orm_user_submits, lambda: manager.get_user_service_submits(user_id)),
+            ("orders", orm_orders, lambda: list(manager.get_all_orders(detailer_id, {"limit": "50"})["results"])),
+            ("clients", orm_clients, lambda: manager.get_detailer_clients(detailer_id)),
+            ("catalog", orm_catalog, repo_catalog),
+        ]
+
+        repeat = options["repeat"]
+        self.stdout.write(f"{'endpoint':<14} {'orm cpu ms':>11} {'pymongo cpu ms':>15} {'speedup':>8}")
+        for name, orm_path, repo_path in cases:
+            orm = cpu_ms(orm_path, repeat)
+            repo = cpu_ms(repo_path, repeat)
+            self.stdout.write(f"{name:<14} {orm:>11.3f} {repo:>15.3f} {orm / repo if repo else 0:>7.1f}x")
@@ -0,0 +1,37 @@
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+
+from core.exceptions import ServiceException
+from core.models import CarService
+from core.services.image_pipeline import image_pipeline
+
+
+class Command(BaseCommand):
+    help = "Generates the WebP and thumbnail variants for services uploaded before the image pipeline existed"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--force", action="store_true", help="Regenerate variants that already exist")
+
+    def handle(self, *args, **options):
+        generated = failed = 0
+        for service in CarService.objects.all():
+            if not service.image or (service.thumbnail and not options["force"]):
+                continue
+            if not default_storage.exists(service.image.name):
+                self.stderr.write(f"{service._id}: {service.image.name} is missing")
+                failed += 1
+                continue
+            try:
+                with service.image.open("rb") as original:
+                    variants = image_pipeline.variants(original)
+            except ServiceException as e:
+                self.stderr.write(f"{service._id}: {e.message}")
+                failed += 1
+                continue
+
+            for field, file in variants.items():
+                setattr(service, field, file)
+            # only the new fields, so view counts flushed meanwhile are not overwritten
+            service.save(update_fields=list(variants))
+            generated += 1
+        self.stdout.write(self.style.SUCCESS(f"Generated variants for {generated} services, {failed} failed"))
@@ -0,0 +1,49 @@
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand, CommandError
+
+from core.models import CarService
+from core.storage import ContentHashedStorage, is_hashed_name
+
+IMAGE_FIELDS = ("image", "image_webp", "thumbnail", "thumbnail_webp")
+
+
+class Command(BaseCommand):
+    help = "Renames stored CarService images to content-hashed names so they can be served as immutable"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action="store_true", help="Only list the files that would be renamed")
+
+    def handle(self, *args, **options):
+        if not isinstance(default_storage, ContentHashedStorage):
+            raise CommandError("DEFAULT_FILE_STORAGE is not core.storage.ContentHashedStorage")
+
+        renamed = missing = 0
+        for service in CarService.objects.all():
+            changed = []
+            for field in IMAGE_FIELDS:
+                name = getattr(service, field).name
+                if not name or is_hashed_name(name):
+                    continue
+                if not default_storage.exists(name):
+                    self.stderr.write(f"{service._id}: {name} is missing")
+                    missing += 1
+                    continue
+
+                if options["dry_run"]:
+                    self.stdout.write(f"{service._id}: {name}")
+                    renamed += 1
+                    continue
+                with default_storage.open(name, "rb") as file:
+                    new_name = default_storage.save(name, file)
+                setattr(service, field, new_name)
+                changed.append((field, name))
+
+            if changed:
+                # only the image fields, so view counts flushed meanwhile are not overwritten
+                service.save(update_fields=[field for field, _ in changed])
+                for _, old_name in changed:
+                    default_storage.delete(old_name)
+                    renamed += 1
+
+        verb = "Would rename" if options["dry_run"] else "Renamed"
+        self.stdout.write(self.style.SUCCESS(f"{verb} {renamed} files, {missing} missing"))
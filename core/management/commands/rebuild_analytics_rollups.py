@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from core.indexes import sync_collection_indexes
+from core.models import CarService
+from core.services.analytics_rollup import analytics_rollup, ROLLUP_COLLECTION
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the per-detailer daily analytics rollups from the booking history"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--detailer-id", action="append", dest="detailer_ids",
+                            help="Only rebuild these detailers (can be repeated)")
+
+    def handle(self, *args, **options):
+        detailer_ids = options["detailer_ids"]
+        services = CarService.objects.all()
+        if detailer_ids:
+            services = services.filter(detailer_id__in=detailer_ids)
+
+        service_detailers = {str(service._id): str(service.detailer_id) for service in services}
+        sync_collection_indexes(ROLLUP_COLLECTION, drop_stale=False)
+        count = analytics_rollup.rebuild(service_detailers, detailer_ids)
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {count} daily rollups for {len(service_detailers)} services"))
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.indexes import INDEX_SPEC, sync_collection_indexes, find_collection_scans
+
+
+class Command(BaseCommand):
+    help = "Creates and reconciles the declared MongoDB indexes and checks query plans for collection scans"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action="store_true", help="Only print what would change")
+        parser.add_argument("--keep-stale", action="store_true", help="Do not drop managed indexes missing from the spec")
+        parser.add_argument("--check", action="store_true",
+                            help="Explain every CarServiceManager query shape and fail on a collection scan")
+
+    def handle(self, *args, **options):
+        failed = False
+        for collection_name in INDEX_SPEC:
+            for action in sync_collection_indexes(collection_name, drop_stale=not options["keep_stale"],
+                                                  dry_run=options["dry_run"]):
+                failed = failed or "FAILED" in action
+                self.stdout.write(action)
+
+        if options["check"]:
+            scans = find_collection_scans()
+            for label, plan in scans:
+                self.stderr.write(f"COLLSCAN in '{label}': {plan}")
+            if scans:
+                raise CommandError(f"{len(scans)} query shape(s) do a collection scan")
+            self.stdout.write(self.style.SUCCESS("No query shape does a collection scan"))
+
+        if failed:
+            raise CommandError("Some indexes could not be created")
+        self.stdout.write(self.style.SUCCESS("Indexes are in sync"))
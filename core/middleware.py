@@ -0,0 +1,13 @@
+from core.services.loader import BatchLoader, _current_loader
+
+
+class BatchLoaderMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = _current_loader.set(BatchLoader())
+        try:
+            return self.get_response(request)
+        finally:
+            _current_loader.reset(token)
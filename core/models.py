@@ -24,6 +24,9 @@ class CarService(models.Model):
     duration = models.IntegerField(default=0)
     label_color = models.CharField(max_length=10, default="#6aa84f")
     view_count = models.PositiveIntegerField(default=0)
+    image_webp = models.ImageField(null=True, blank=True)
+    thumbnail = models.ImageField(null=True, blank=True)
+    thumbnail_webp = models.ImageField(null=True, blank=True)
     objects = models.Manager()
 
     def __str__(self):
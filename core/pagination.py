@@ -0,0 +1,65 @@
+import base64
+import binascii
+from datetime import datetime
+
+from bson import ObjectId
+from bson.errors import InvalidId
+from django.conf import settings
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination, Cursor
+from rest_framework import status
+
+from .exceptions import ServiceException
+
+
+class ObjectIdCursorPagination(CursorPagination):
+    ordering = "_id"
+    page_size = settings.SERVICE_CATALOG_PAGE_SIZE
+    page_size_query_param = "page_size"
+    max_page_size = settings.SERVICE_CATALOG_MAX_PAGE_SIZE
+
+    def paginate_collection(self, fetch_page, request) -> tuple[list, str | None, str | None]:
+        # keyset pagination over raw rows: fetch_page(position, reverse, limit) returns rows sorted away from position
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        page_size = self.get_page_size(request)
+        cursor = self.decode_cursor(request)
+        position = cursor.position if cursor else None
+        reverse = cursor.reverse if cursor else False
+
+        rows = fetch_page(position, reverse, page_size + 1)
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+        if reverse:
+            rows.reverse()
+        if not rows:
+            return rows, None, None
+
+        has_next = has_more if not reverse else position is not None
+        has_previous = position is not None if not reverse else has_more
+        next_link = self.encode_cursor(Cursor(offset=0, reverse=False, position=str(rows[-1]["_id"]))) \
+            if has_next else None
+        previous_link = self.encode_cursor(Cursor(offset=0, reverse=True, position=str(rows[0]["_id"]))) \
+            if has_previous else None
+        return rows, next_link, previous_link
+
+    def decode_cursor(self, request):
+        cursor = super().decode_cursor(request)
+        if cursor is None or cursor.position is None:
+            return cursor
+        try:
+            return Cursor(offset=cursor.offset, reverse=cursor.reverse, position=ObjectId(cursor.position))
+        except (InvalidId, TypeError):
+            raise NotFound(self.invalid_cursor_message)
+
+
+def encode_keyset_cursor(date: datetime, object_id: ObjectId) -> str:
+    return base64.urlsafe_b64encode(f"{date.isoformat()}|{object_id}".encode("utf-8")).decode("ascii")
+
+
+def decode_keyset_cursor(cursor: str) -> tuple[datetime, ObjectId]:
+    try:
+        date, object_id = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8").split("|")
+        return datetime.fromisoformat(date), ObjectId(object_id)
+    except (binascii.Error, UnicodeError, ValueError, InvalidId):
+        raise ServiceException(message="Invalid cursor", status_code=status.HTTP_400_BAD_REQUEST)
@@ -1,7 +1,6 @@
-from bson import ObjectId
 from rest_framework import permissions
 
-from .models import Role
+from .services.reference_data import role_registry
 
 
 class HasRole(permissions.BasePermission):
@@ -9,7 +8,7 @@ class HasRole(permissions.BasePermission):
         self.role_name = role_name
 
     def has_permission(self, request, view):
-        role = Role.objects.filter(_id=ObjectId(request.user.role_id)).first()
+        role = role_registry.get(getattr(request.user, "role_id", None))
         if not role or role.name != self.role_name:
              return False
         return True
@@ -0,0 +1,128 @@
+from datetime import datetime, time
+from typing import Iterable, Iterator
+
+from bson import ObjectId
+from bson.errors import InvalidId
+from pymongo import ASCENDING, DESCENDING
+
+from core.db import get_collection
+from core.models import CarService, CarServiceSchedule, CarServiceScheduleSubmit, Car, AppUser, \
+    Employee
+
+SERVICE_SLOT_FIELDS = ("name", "price", "duration", "label_color", "detailer_id")
+CATALOG_FIELDS = ("id", "name", "price", "description", "image", "detailer_id", "duration", "label_color",
+                  "view_count", "image_webp", "thumbnail", "thumbnail_webp")
+USER_CONTACT_FIELDS = ("id", "email", "first_name", "last_name", "phone", "street", "city", "zip_code")
+# documents per cursor round trip for the streamed list endpoints
+STREAM_BATCH_SIZE = 500
+
+
+def _projection(fields: Iterable[str]) -> dict[str, int]:
+    return {field: 1 for field in fields}
+
+
+def _object_ids(ids: Iterable) -> list[ObjectId]:
+    result = []
+    for object_id in ids:
+        try:
+            result.append(ObjectId(object_id))
+        except (InvalidId, TypeError):
+            pass
+    return result
+
+
+def stored_time(value: time) -> datetime:
+    # the inverse of as_time: how djongo's adapt_timefield_value writes a TimeField
+    return datetime(1900, 1, 1, value.hour, value.minute, value.second, value.microsecond)
+
+
+def as_time(value) -> time:
+    # djongo stores TimeField values as datetimes on 1900-01-01; strings are accepted for hand-written documents
+    if isinstance(value, datetime):
+        return value.time()
+    if isinstance(value, time):
+        return value
+    return time.fromisoformat(value)
+
+
+class ReadRepository:
+    def get_service(self, service_id, fields: Iterable[str] = SERVICE_SLOT_FIELDS) -> dict | None:
+        object_ids = _object_ids([service_id])
+        if not object_ids:
+            return None
+        return get_collection(CarService).find_one({"_id": object_ids[0]}, _projection(fields))
+
+    def find_services(self, query: dict, fields: Iterable[str] = SERVICE_SLOT_FIELDS) -> list[dict]:
+        return list(get_collection(CarService).find(query, _projection(fields)))
+
+    def services_by_ids(self, service_ids: Iterable, fields: Iterable[str] = SERVICE_SLOT_FIELDS) -> dict[str, dict]:
+        return {str(row["_id"]): row for row in
+                get_collection(CarService).find({"_id": {"$in": _object_ids(set(service_ids))}},
+                                                _projection(fields))}
+
+    def services_page(self, position: ObjectId | None, reverse: bool, limit: int) -> list[dict]:
+        query = {}
+        if position is not None:
+            query["_id"] = {"$lt" if reverse else "$gt": position}
+        return list(get_collection(CarService).find(query, _projection(CATALOG_FIELDS))
+                    .sort("_id", DESCENDING if reverse else ASCENDING)
+                    .limit(limit))
+
+    def schedules_for_services(self, service_ids: Iterable) -> list[dict]:
+        return list(get_collection(CarServiceSchedule).find({"service_id": {"$in": [str(s) for s in service_ids]}},
+                                                            {"service_id": 1, "day_of_week": 1, "time": 1}))
+
+    def find_schedule(self, service_id, day_of_week: int, schedule_time: time) -> dict | None:
+        return get_collection(CarServiceSchedule).find_one({"service_id": str(service_id),
+                                                            "day_of_week": day_of_week,
+                                                            "time": stored_time(schedule_time)},
+                                                           {"_id": 1})
+
+    def car_exists(self, car_id) -> bool:
+        object_ids = _object_ids([car_id])
+        return bool(object_ids) and get_collection(Car).find_one({"_id": object_ids[0]}, {"_id": 1}) is not None
+
+    def taken_slots(self, schedule_ids: Iterable | None, range_start: datetime, range_end: datetime) -> list[dict]:
+        query = {"date": {"$gte": range_start, "$lt": range_end}}
+        if schedule_ids is not None:
+            query["schedule_id"] = {"$in": [str(s) for s in schedule_ids]}
+        return list(get_collection(CarServiceScheduleSubmit).find(query, {"_id": 0, "schedule_id": 1, "date": 1}))
+
+    def upcoming_user_submits(self, user_id, now: datetime) -> list[dict]:
+        return list(get_collection(CarServiceScheduleSubmit)
+                    .find({"user_id": str(user_id), "date": {"$gt": now}},
+                          {"date": 1, "service_id": 1, "car_id": 1}))
+
+    def cars_by_ids(self, car_ids: Iterable) -> dict[str, dict]:
+        return {str(row["_id"]): row for row in
+                get_collection(Car).find({"_id": {"$in": _object_ids(set(car_ids))}},
+                                         {"manufacturer": 1, "model": 1})}
+
+    def users_by_ids(self, user_ids: Iterable, fields: Iterable[str] = USER_CONTACT_FIELDS) -> dict[str, dict]:
+        return {str(row["id"]): row for row in self.iter_users(user_ids, fields)}
+
+    def iter_users(self, user_ids: Iterable, fields: Iterable[str] = USER_CONTACT_FIELDS,
+                   batch_size: int = STREAM_BATCH_SIZE) -> Iterator[dict]:
+        ids = set()
+        for user_id in user_ids:
+            try:
+                ids.add(int(user_id))
+            except (TypeError, ValueError):
+                pass
+        return get_collection(AppUser).find({"id": {"$in": list(ids)}}, {"_id": 0, **_projection(fields)}) \
+            .batch_size(batch_size)
+
+    def employees_by_ids(self, employee_ids: Iterable) -> dict[str, dict]:
+        return {str(row["_id"]): row for row in
+                get_collection(Employee).find({"_id": {"$in": _object_ids(set(employee_ids))}},
+                                              {"first_name": 1, "last_name": 1})}
+
+    def iter_client_submits(self, service_ids: Iterable, user_id,
+                            batch_size: int = STREAM_BATCH_SIZE) -> Iterator[dict]:
+        return get_collection(CarServiceScheduleSubmit) \
+            .find({"service_id": {"$in": [str(s) for s in service_ids]}, "user_id": str(user_id)},
+                  {"date": 1, "user_id": 1, "car_id": 1, "service_id": 1, "status_id": 1, "employee_id": 1}) \
+            .batch_size(batch_size)
+
+
+read_repository = ReadRepository()
@@ -1,6 +1,9 @@
+from django.conf import settings
+from django.core.files.storage import default_storage
 from rest_framework import serializers
 
 from .models import CarService, AppUser, CarServiceSchedule, Car, Employee, SubmitStatus, Invoice
+from .services.loader import get_loader
 
 
 class UserCreateSerializer(serializers.ModelSerializer):
@@ -25,15 +28,49 @@ class UserSerializer(serializers.ModelSerializer):
         fields = ["id", "username"]
 
 
+class CarServiceListSerializer(serializers.ListSerializer):
+    def to_representation(self, data):
+        services = list(data.all() if hasattr(data, "all") else data)
+        get_loader().prime(AppUser, {service.detailer_id for service in services})
+        return super().to_representation(services)
+
+
 class CarServiceSerializer(serializers.ModelSerializer):
     detailer = serializers.SerializerMethodField()
 
     def get_detailer(self, obj):
-        return UserSerializer(AppUser.objects.filter(id=obj.detailer_id).first()).data
+        return UserSerializer(get_loader().load(AppUser, obj.detailer_id)).data
 
     class Meta:
         model = CarService
         fields = "__all__"
+        list_serializer_class = CarServiceListSerializer
+
+
+def serialize_catalog_row(row: dict, detailers: dict[str, dict], request) -> dict:
+    # same shape as CarServiceSerializer, built from a projected CarService document;
+    # catalog cards show the thumbnail, the original stays available on the details endpoint
+    detailer = detailers.get(str(row.get("detailer_id")))
+
+    def url(name):
+        return request.build_absolute_uri(default_storage.url(name)) if name else None
+
+    return {
+        "_id": str(row["_id"]),
+        "detailer": {"id": detailer["id"], "username": detailer.get("username")} if detailer else {"username": ""},
+        "id": row.get("id"),
+        "name": row.get("name"),
+        "price": row.get("price"),
+        "description": row.get("description"),
+        "image": url(row.get("thumbnail") or row.get("image")),
+        "detailer_id": row.get("detailer_id"),
+        "duration": row.get("duration", 0),
+        "label_color": row.get("label_color"),
+        "view_count": row.get("view_count", 0),
+        "image_webp": url(row.get("thumbnail_webp") or row.get("image_webp")),
+        "thumbnail": url(row.get("thumbnail")),
+        "thumbnail_webp": url(row.get("thumbnail_webp")),
+    }
 
 
 class CarServiceScheduleSerializer(serializers.ModelSerializer):
@@ -47,6 +84,36 @@ class SubmitScheduleCreateSerializer(serializers.Serializer):
     date = serializers.DateTimeField()
 
 
+class BookingItemSerializer(serializers.Serializer):
+    service_id = serializers.CharField(max_length=30)
+    date = serializers.CharField(max_length=40)
+    car_id = serializers.CharField(max_length=30)
+
+
+class RecurringBookingSerializer(serializers.Serializer):
+    service_id = serializers.CharField(max_length=30)
+    start = serializers.CharField(max_length=40)
+    car_ids = serializers.ListField(child=serializers.CharField(max_length=30), min_length=1,
+                                    max_length=settings.BULK_BOOKING_MAX_ITEMS)
+    interval_weeks = serializers.IntegerField(min_value=1, default=1)
+    count = serializers.IntegerField(min_value=1, max_value=settings.BULK_BOOKING_MAX_ITEMS)
+
+    def validate(self, attrs):
+        if len(attrs["car_ids"]) * attrs["count"] > settings.BULK_BOOKING_MAX_ITEMS:
+            raise serializers.ValidationError(f"At most {settings.BULK_BOOKING_MAX_ITEMS} bookings per request")
+        return attrs
+
+
+class BulkSubmitScheduleSerializer(serializers.Serializer):
+    bookings = BookingItemSerializer(many=True, required=False)
+    recurrence = RecurringBookingSerializer(required=False)
+
+    def validate(self, attrs):
+        if not attrs.get("bookings") and not attrs.get("recurrence"):
+            raise serializers.ValidationError("Provide bookings or a recurrence rule")
+        return attrs
+
+
 class ProfileSerializer(serializers.ModelSerializer):
     # company_name = serializers.CharField(max_length=200, required=False)
     # nip = serializers.CharField(max_length=11, required=False)
@@ -0,0 +1,122 @@
+from collections import defaultdict
+from datetime import date, datetime
+from typing import Iterable
+
+from pymongo import UpdateOne, ASCENDING
+
+from core.db import get_database, get_collection
+from core.models import CarServiceScheduleSubmit
+
+ROLLUP_COLLECTION = "core_detailerdailyrollup"
+
+
+class AnalyticsRollup:
+    def collection(self):
+        return get_database()[ROLLUP_COLLECTION]
+
+    @staticmethod
+    def _day(value: date | datetime) -> str:
+        return value.strftime("%Y-%m-%d")
+
+    def _update(self, detailer_id: str, day: date | datetime, delta: int, user_id: str = None,
+                employee_id: str = None, count_order: bool = True) -> UpdateOne:
+        inc = {}
+        if count_order:
+            inc["orders"] = delta
+            if user_id:
+                inc[f"clients.{user_id}"] = delta
+        if employee_id:
+            inc[f"employees.{employee_id}"] = delta
+        return UpdateOne({"detailer_id": str(detailer_id), "day": self._day(day)}, {"$inc": inc}, upsert=True)
+
+    def _write(self, updates: list[UpdateOne]) -> None:
+        if updates:
+            self.collection().bulk_write(updates, ordered=False)
+
+    def booking_created(self, detailer_id: str, day: date | datetime, user_id: str, employee_id: str = None) -> None:
+        self._write([self._update(detailer_id, day, 1, user_id, employee_id)])
+
+    def bookings_created(self, bookings: Iterable[tuple[str, date | datetime, str]]) -> None:
+        self._write([self._update(detailer_id, day, 1, user_id) for detailer_id, day, user_id in bookings])
+
+    def booking_cancelled(self, detailer_id: str, day: date | datetime, user_id: str, employee_id: str = None) -> None:
+        self._write([self._update(detailer_id, day, -1, user_id, employee_id)])
+
+    def booking_moved(self, detailer_id: str, old_day: date | datetime, new_day: date | datetime, user_id: str,
+                      employee_id: str = None) -> None:
+        if self._day(old_day) == self._day(new_day):
+            return
+        self._write([self._update(detailer_id, old_day, -1, user_id, employee_id),
+                     self._update(detailer_id, new_day, 1, user_id, employee_id)])
+
+    def employee_reassigned(self, detailer_id: str, day: date | datetime, old_employee_id: str | None,
+                            new_employee_id: str | None) -> None:
+        if old_employee_id == new_employee_id:
+            return
+        updates = []
+        if old_employee_id:
+            updates.append(self._update(detailer_id, day, -1, employee_id=old_employee_id, count_order=False))
+        if new_employee_id:
+            updates.append(self._update(detailer_id, day, 1, employee_id=new_employee_id, count_order=False))
+        self._write(updates)
+
+    def read(self, detailer_id: str, day_from: date, day_to: date) -> tuple[dict, dict, dict]:
+        orders = {}
+        employees = defaultdict(int)
+        clients = defaultdict(int)
+        rows = self.collection().find({"detailer_id": str(detailer_id),
+                                       "day": {"$gte": self._day(day_from), "$lte": self._day(day_to)}},
+                                      {"_id": 0, "day": 1, "orders": 1, "employees": 1, "clients": 1}) \
+            .sort("day", ASCENDING)
+        for row in rows:
+            if row.get("orders", 0) > 0:
+                orders[row["day"]] = row["orders"]
+            for employee_id, count in row.get("employees", {}).items():
+                employees[employee_id] += count
+            for client_id, count in row.get("clients", {}).items():
+                clients[client_id] += count
+
+        return (orders,
+                {employee_id: count for employee_id, count in employees.items() if count > 0},
+                {client_id: count for client_id, count in clients.items() if count > 0})
+
+    def rebuild(self, service_detailers: dict[str, str], detailer_ids: Iterable[str] = None) -> int:
+        service_ids = list(service_detailers.keys())
+        buckets = defaultdict(lambda: {"orders": 0, "employees": defaultdict(int), "clients": defaultdict(int)})
+        rows = get_collection(CarServiceScheduleSubmit).aggregate([
+            {"$match": {"service_id": {"$in": service_ids}}},
+            {"$group": {
+                "_id": {
+                    "service_id": "$service_id",
+                    "day": {"$dateToString": {"format": "%Y-%m-%d", "date": "$date"}},
+                    "user_id": "$user_id",
+                    "employee_id": "$employee_id"
+                },
+                "count": {"$sum": 1}
+            }}
+        ], allowDiskUse=True)
+
+        for row in rows:
+            key = row["_id"]
+            bucket = buckets[(service_detailers[key["service_id"]], key["day"])]
+            bucket["orders"] += row["count"]
+            if key.get("user_id"):
+                bucket["clients"][key["user_id"]] += row["count"]
+            if key.get("employee_id"):
+                bucket["employees"][key["employee_id"]] += row["count"]
+
+        collection = self.collection()
+        if detailer_ids is None:
+            collection.delete_many({})
+        else:
+            collection.delete_many({"detailer_id": {"$in": [str(d) for d in detailer_ids]}})
+
+        documents = [{"detailer_id": detailer_id, "day": day, "orders": bucket["orders"],
+                      "employees": dict(bucket["employees"]), "clients": dict(bucket["clients"])}
+                     for (detailer_id, day), bucket in buckets.items()]
+        if documents:
+            collection.insert_many(documents, ordered=False)
+        return len(documents)
+
+
+analytics_rollup = AnalyticsRollup()
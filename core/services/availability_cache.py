@@ -0,0 +1,37 @@
+from datetime import date, datetime
+from typing import Iterable
+
+from django.conf import settings
+
+from core.caching import LRUCache, MISSING
+
+
+class AvailabilityCache:
+    def __init__(self, max_size: int, ttl: float):
+        self.cache = LRUCache(max_size, ttl)
+
+    def get_days(self, service_id: str, days: Iterable[date]) -> dict[date, list[tuple[datetime, dict]]]:
+        found = {}
+        for day in days:
+            slots = self.cache.get((str(service_id), day))
+            if slots is not MISSING:
+                found[day] = slots
+        return found
+
+    def set_day(self, service_id: str, day: date, slots: list[tuple[datetime, dict]]) -> None:
+        self.cache.set((str(service_id), day), slots)
+
+    def invalidate_day(self, service_id: str, day: date | datetime) -> None:
+        if isinstance(day, datetime):
+            day = day.date()
+        self.cache.delete((str(service_id), day))
+
+    def invalidate_service(self, service_id: str) -> None:
+        service_id = str(service_id)
+        self.cache.delete_where(lambda key: key[0] == service_id)
+
+    def stats(self) -> dict[str, int | float | None]:
+        return self.cache.stats()
+
+
+availability_cache = AvailabilityCache(settings.AVAILABILITY_CACHE_SIZE, settings.AVAILABILITY_CACHE_TTL)
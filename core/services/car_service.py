@@ -1,23 +1,74 @@
-from collections import defaultdict
-from datetime import datetime, timedelta
-from io import BytesIO
-from typing import Any
-import os
+from datetime import datetime, timedelta, timezone as dt_timezone
+from typing import Any, Iterator
 
-import pdfkit
 from bson import ObjectId
+from django.conf import settings
 from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
 from django.db.models import Max
+from django.http import Http404
+from pymongo import ASCENDING, ReturnDocument
+from pymongo.errors import DuplicateKeyError, BulkWriteError
 from rest_framework import status
-from rest_framework.generics import get_object_or_404
 import base64
+import json
+import logging
 import uuid
 
+from core.db import get_collection
 from core.exceptions import ServiceException
-from core.models import CarServiceSchedule, CarServiceScheduleSubmit, CarService, Role, AppUser, SubmitStatus, Employee, \
+from core.indexes import require_unique_index
+from core.models import CarServiceSchedule, CarServiceScheduleSubmit, CarService, AppUser, SubmitStatus, Employee, \
     Invoice, Car
-
-from core.utils import is_correct_iso_date, get_dates_diff_days
+from core.pagination import encode_keyset_cursor, decode_keyset_cursor
+from core.repositories import read_repository, STREAM_BATCH_SIZE
+
+from core.services.analytics_rollup import analytics_rollup
+from core.services.availability_cache import availability_cache
+from core.services.invoice_export import invoice_exporter
+from core.services.invoice_pdf_cache import invoice_pdf_cache
+from core.services.invoice_render_pool import invoice_render_pool, RenderJob
+from core.services.invoice_template import invoice_template
+from core.services.image_pipeline import image_pipeline
+from core.services.loader import get_loader
+from core.services.reference_data import role_registry, status_registry
+from core.services.service_index import service_index
+from core.services.slot_engine import SlotEngine
+from core.services.view_counter import view_counter
+from core.streaming import iter_batches
+from core.utils import is_correct_iso_date, get_dates_diff_days, parse_naive_utc
+
+logger = logging.getLogger(__name__)
+
+slot_engine = SlotEngine()
+
+
+def require_booking_index() -> None:
+    # without it the atomic writes below would silently double book
+    require_unique_index(CarServiceScheduleSubmit._meta.db_table, "schedule_id", "date")
+
+
+def submit_document(schedule_id, date: datetime, user_id, service_id, car_id, status_id) -> dict:
+    # mirrors the document djongo writes for a CarServiceScheduleSubmit
+    return {
+        "id": None,
+        "date": date,
+        "schedule_id": str(schedule_id),
+        "user_id": str(user_id),
+        "service_id": str(service_id),
+        "car_id": str(car_id),
+        "status_id": str(status_id),
+        "employee_id": None
+    }
+
+CLIENT_SORT_FIELDS = ("visit_count", "last_visit", "next_booking", "total_spend")
+
+# MongoDB $dateToString formats, also valid for datetime.strftime
+BUCKET_FORMATS = {
+    "day": "%Y-%m-%d",
+    "week": "%G-W%V",
+    "month": "%Y-%m",
+}
 
 
 class CarServiceManager:
@@ -35,37 +86,125 @@ class CarServiceManager:
         return result
 
     def submit_schedule(self, service_id: str, date: str, user_id: int, car_id: int):
-        pending_status = SubmitStatus.objects.filter(name="pending").first()
+        pending_status = status_registry.get_by_name("pending")
         if not pending_status:
             raise ServiceException(message="Pending status not exists",
                                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-        car_id = ObjectId(car_id)
-        service = get_object_or_404(CarService, _id=ObjectId(service_id))
-        confirmed_date = datetime.fromisoformat(date)
+        service = read_repository.get_service(service_id, ("detailer_id",))
+        if not service:
+            raise Http404("No CarService matches the given query.")
+        confirmed_date = parse_naive_utc(date)
         if confirmed_date < datetime.now():
             raise ServiceException(message="Date in the past is not allowed", status_code=status.HTTP_400_BAD_REQUEST)
 
-        confirmed_time = confirmed_date.strftime("%H:%M:%S")
-        schedule = CarServiceSchedule.objects.filter(service_id=service._id, time=confirmed_time).first()
+        schedule = read_repository.find_schedule(service_id, confirmed_date.isoweekday(), confirmed_date.time())
         if not schedule:
             raise ServiceException(message="Service time not found", status_code=status.HTTP_400_BAD_REQUEST)
 
-        schedule_submit = CarServiceScheduleSubmit.objects.filter(schedule_id=schedule._id, date=confirmed_date).first()
-        if schedule_submit:
+        if not read_repository.car_exists(car_id):
+            raise ServiceException(message="Car not found", status_code=status.HTTP_400_BAD_REQUEST)
+
+        # the unique (schedule_id, date) index decides between concurrent bookings of the same slot
+        require_booking_index()
+        try:
+            get_collection(CarServiceScheduleSubmit).insert_one(
+                submit_document(schedule["_id"], confirmed_date, user_id, service_id, car_id, pending_status._id))
+        except DuplicateKeyError:
             raise ServiceException(message="Selected schedule is not available",
                                    status_code=status.HTTP_400_BAD_REQUEST)
+        availability_cache.invalidate_day(service_id, confirmed_date)
+        analytics_rollup.booking_created(service["detailer_id"], confirmed_date, str(user_id))
 
-        car = Car.objects.filter(_id=car_id).first()
-        if not car:
+    def expand_recurrence(self, rule: dict[str, Any]) -> list[dict[str, str]]:
+        # checked before expanding so an oversized rule never materializes
+        if len(rule["car_ids"]) * rule["count"] > settings.BULK_BOOKING_MAX_ITEMS:
+            raise ServiceException(message=f"At most {settings.BULK_BOOKING_MAX_ITEMS} bookings per request",
+                                   status_code=status.HTTP_400_BAD_REQUEST)
+        try:
+            start = parse_naive_utc(rule["start"])
+        except ValueError:
+            raise ServiceException(message="Invalid start date format", status_code=status.HTTP_400_BAD_REQUEST)
+        step = timedelta(weeks=rule.get("interval_weeks", 1))
+        return [{"service_id": rule["service_id"], "date": (start + step * i).isoformat(), "car_id": car_id}
+                for car_id in rule["car_ids"] for i in range(rule["count"])]
+
+    def submit_schedules_bulk(self, user_id: int, bookings: list[dict[str, str]]) -> dict[str, Any]:
+        if len(bookings) > settings.BULK_BOOKING_MAX_ITEMS:
+            raise ServiceException(message=f"At most {settings.BULK_BOOKING_MAX_ITEMS} bookings per request",
+                                   status_code=status.HTTP_400_BAD_REQUEST)
+        pending_status = status_registry.get_by_name("pending")
+        if not pending_status:
+            raise ServiceException(message="Pending status not exists",
+                                   status_code=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+        # one query per collection for the whole batch, everything else is checked in memory
+        services = read_repository.services_by_ids({b["service_id"] for b in bookings}, ("detailer_id",))
+        week = slot_engine.load_week(services.keys())
+        cars = read_repository.cars_by_ids({b["car_id"] for b in bookings})
+
+        now = datetime.now()
+        results = [{"service_id": b["service_id"], "date": b["date"], "car_id": b["car_id"]} for b in bookings]
+        accepted = []
+        seen = set()
+        for index, booking in enumerate(bookings):
+            try:
+                schedule_id, confirmed_date = self._match_booking(booking, services, week, cars, now)
+                if (schedule_id, confirmed_date) in seen:
+                    raise ServiceException(message="Selected schedule is not available",
+                                           status_code=status.HTTP_400_BAD_REQUEST)
+            except ServiceException as e:
+                results[index].update({"status": "rejected", "message": e.message})
+                continue
+            seen.add((schedule_id, confirmed_date))
+            accepted.append((index, submit_document(schedule_id, confirmed_date, user_id, booking["service_id"],
+                                                    booking["car_id"], pending_status._id)))
+
+        # unordered, so a slot taken by someone else only fails its own item
+        failed = set()
+        if accepted:
+            require_booking_index()
+            try:
+                get_collection(CarServiceScheduleSubmit).insert_many([doc for _, doc in accepted], ordered=False)
+            except BulkWriteError as e:
+                for write_error in e.details["writeErrors"]:
+                    if write_error["code"] != 11000:
+                        raise
+                    failed.add(write_error["index"])
+
+        booked = []
+        for position, (index, doc) in enumerate(accepted):
+            if position in failed:
+                results[index].update({"status": "rejected", "message": "Selected schedule is not available"})
+            else:
+                results[index].update({"status": "booked", "id": str(doc["_id"])})
+                booked.append(doc)
+
+        for service_id, day in {(doc["service_id"], doc["date"].date()) for doc in booked}:
+            availability_cache.invalidate_day(service_id, day)
+        analytics_rollup.bookings_created((services[doc["service_id"]]["detailer_id"], doc["date"], str(user_id))
+                                          for doc in booked)
+
+        return {"booked": len(booked), "rejected": len(bookings) - len(booked), "results": results}
+
+    @staticmethod
+    def _match_booking(booking: dict[str, str], services: dict[str, dict], week: dict, cars: dict[str, dict],
+                       now: datetime) -> tuple[str, datetime]:
+        try:
+            confirmed_date = parse_naive_utc(booking["date"])
+        except ValueError:
+            raise ServiceException(message="Invalid date format", status_code=status.HTTP_400_BAD_REQUEST)
+        if confirmed_date < now:
+            raise ServiceException(message="Date in the past is not allowed", status_code=status.HTTP_400_BAD_REQUEST)
+        if booking["service_id"] not in services:
+            raise ServiceException(message="Service not found", status_code=status.HTTP_400_BAD_REQUEST)
+        if booking["car_id"] not in cars:
             raise ServiceException(message="Car not found", status_code=status.HTTP_400_BAD_REQUEST)
 
-        CarServiceScheduleSubmit(date=confirmed_date,
-                                 schedule_id=schedule._id,
-                                 user_id=user_id,
-                                 car_id=car_id,
-                                 service_id=service_id,
-                                 status_id=pending_status._id).save()
+        for schedule_id, schedule_time in week[booking["service_id"]].get(confirmed_date.isoweekday(), []):
+            if schedule_time == confirmed_date.time():
+                return schedule_id, confirmed_date
+        raise ServiceException(message="Service time not found", status_code=status.HTTP_400_BAD_REQUEST)
 
     def get_available_schedules(self, service_id: str, date_from: str, date_to: str) -> list[dict[str, str]]:
         service_id = ObjectId(service_id)
@@ -75,54 +214,102 @@ class CarServiceManager:
         if get_dates_diff_days(date_from, date_to) > 31:
             raise ServiceException(message="Date range is too large", status_code=status.HTTP_400_BAD_REQUEST)
 
-        service = get_object_or_404(CarService, _id=service_id)
-        date_from = datetime.fromisoformat(date_from)
-        date_to = datetime.fromisoformat(date_to)
-
-        print("66fae8cc11451b11b5895cea" == str(service_id))
-        print(service_id)
-        dates = []
-        while date_from <= date_to:
-            schedules = CarServiceSchedule.objects.filter(service_id=str(service_id),
-                                                          day_of_week=date_from.weekday() + 1).all()
-            if schedules:
-                for sh in schedules:
-                    submit_exists = False
-                    for submit in CarServiceScheduleSubmit.objects.filter(schedule_id=str(sh._id)).all():
-                        if submit.date.date() == date_from.date():
-                            submit_exists = True
-                            break
-                    if not submit_exists:
-                        service_start_date = datetime(date_from.year, date_from.month, date_from.day, sh.time.hour,
-                                                      sh.time.minute, sh.time.second)
-                        if service_start_date >= datetime.now():
-                            service_end_date = service_start_date + timedelta(minutes=service.duration)
-                            dates.append({
-                                "text": service_start_date.strftime("%H:%M") + " " + service.name,
-                                "start": service_start_date.strftime("%Y-%m-%dT%H:%M:%S"),
-                                "end": service_end_date.strftime("%Y-%m-%dT%H:%M:%S"),
-                                "backColor": service.label_color
-                            })
-
-            date_from += timedelta(days=1)
-        return dates
+        day_from = datetime.fromisoformat(date_from).date()
+        day_to = datetime.fromisoformat(date_to).date()
+        days = [day_from + timedelta(days=i) for i in range((day_to - day_from).days + 1)]
+
+        cached = availability_cache.get_days(service_id, days)
+        missing = [day for day in days if day not in cached]
+        if missing:
+            service = read_repository.get_service(service_id)
+            if not service:
+                raise Http404("No CarService matches the given query.")
+            week = slot_engine.load_week([service["_id"]])
+            schedule_ids = [schedule_id for day_schedules in week[str(service["_id"])].values()
+                            for schedule_id, _ in day_schedules]
+            taken = slot_engine.load_taken(schedule_ids, missing[0], missing[-1])
+
+            # cache whole days; slots already in the past are filtered out per request below
+            for day, slots in slot_engine.iter_days([service], week, taken, missing[0], missing[-1], datetime.min):
+                if day not in cached:
+                    cached[day] = [(start, slot_engine.format_slot(start, slot_service)) for start, slot_service in slots]
+                    availability_cache.set_day(service_id, day, cached[day])
+
+        now = datetime.now()
+        return [slot for day in days for start, slot in cached[day] if start >= now]
+
+    def find_first_free_slots(self, date_from: str, date_to: str, max_price: str = None, max_duration: str = None,
+                              limit: str = None) -> list[dict[str, str | float]]:
+        if not is_correct_iso_date(date_from) or not is_correct_iso_date(date_to):
+            raise ServiceException(message="Invalid date format, use YYYY-MM-DDTHH:MM",
+                                   status_code=status.HTTP_400_BAD_REQUEST)
+        window_start = parse_naive_utc(date_from)
+        window_end = parse_naive_utc(date_to)
+        if abs((window_end - window_start).days) > 31:
+            raise ServiceException(message="Date range is too large", status_code=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            limit = min(int(limit), 100) if limit else 20
+            query = {}
+            if max_price:
+                query["price"] = {"$lte": float(max_price)}
+            if max_duration:
+                query["duration"] = {"$lte": int(max_duration)}
+        except ValueError:
+            raise ServiceException(message="Invalid search filters", status_code=status.HTTP_400_BAD_REQUEST)
+
+        if limit <= 0 or window_end < window_start:
+            return []
+        services = read_repository.find_services(query)
+        if not services:
+            return []
+
+        week = slot_engine.load_week(service["_id"] for service in services)
+        taken = slot_engine.load_taken(None, window_start.date(), window_end.date())
+
+        result = []
+        for _, slots in slot_engine.iter_days(services, week, taken, window_start.date(), window_end.date(),
+                                              max(window_start, datetime.now())):
+            for start, service in sorted(slots, key=lambda slot: slot[0]):
+                if start > window_end:
+                    return result
+                slot = slot_engine.format_slot(start, service)
+                result.append({
+                    "service_id": str(service["_id"]),
+                    "service_name": service["name"],
+                    "service_price": service["price"],
+                    "duration": service.get("duration", 0),
+                    "detailer_id": service["detailer_id"],
+                    "start": slot["start"],
+                    "end": slot["end"],
+                    "backColor": slot["backColor"]
+                })
+                if len(result) >= limit:
+                    return result
+        return result
 
     def get_user_service_submits(self, user_id: int) -> list[dict[str, str | float]]:
-        submits = CarServiceScheduleSubmit.objects.filter(user_id=user_id, date__gt=datetime.now()).all()
+        submits = read_repository.upcoming_user_submits(user_id, datetime.now())
+        services = read_repository.services_by_ids({sub["service_id"] for sub in submits},
+                                                   ("name", "price", "image", "thumbnail"))
+        cars = read_repository.cars_by_ids({sub["car_id"] for sub in submits})
+
         result = []
         for sub in submits:
-            schedule = CarServiceSchedule.objects.filter(_id=ObjectId(sub.schedule_id)).first()
-            service = CarService.objects.filter(_id=ObjectId(schedule.service_id)).first()
-            car = Car.objects.filter(_id=ObjectId(sub.car_id)).first()
+            service = services.get(sub["service_id"])
+            car = cars.get(sub["car_id"])
+            if not service or not car:
+                continue
+            image = service.get("thumbnail") or service.get("image")
             result.append({
-                "service_id": str(service._id),
-                "service_name": service.name,
-                "service_price": service.price,
-                "service_image": service.image.url,
-                "date": sub.date,
-                "submit_id": str(sub._id),
-                "car_id": sub.car_id,
-                "car_name": car.manufacturer + " " + car.model
+                "service_id": str(service["_id"]),
+                "service_name": service["name"],
+                "service_price": service["price"],
+                "service_image": default_storage.url(image) if image else None,
+                "date": sub["date"].replace(tzinfo=dt_timezone.utc),
+                "submit_id": str(sub["_id"]),
+                "car_id": sub["car_id"],
+                "car_name": car["manufacturer"] + " " + car["model"]
             })
         return result
 
@@ -135,32 +322,47 @@ class CarServiceManager:
                                    status_code=status.HTTP_403_FORBIDDEN)
 
         submit.delete()
+        availability_cache.invalidate_day(submit.service_id, submit.date)
+        service = get_loader().load(CarService, submit.service_id)
+        if service:
+            analytics_rollup.booking_cancelled(service.detailer_id, submit.date, submit.user_id, submit.employee_id)
 
     def update_submit(self, user_id: int, submit_id: str, new_date: str, car_id: int) -> None:
         if not is_correct_iso_date(new_date):
             raise ServiceException(message="Invalid date format, use YYYY-MM-DD",
                                    status_code=status.HTTP_400_BAD_REQUEST)
 
-        submit = CarServiceScheduleSubmit.objects.get(_id=ObjectId(submit_id))
+        new_date = parse_naive_utc(new_date)
+        submits = get_collection(CarServiceScheduleSubmit)
+        # a single conditional update: ownership check, move and slot conflict are resolved by the server
+        require_booking_index()
+        try:
+            submit = submits.find_one_and_update({"_id": ObjectId(submit_id), "user_id": str(user_id)},
+                                                 {"$set": {"date": new_date,
+                                                           "car_id": str(car_id) if car_id is not None else None}},
+                                                 projection={"date": 1, "service_id": 1, "user_id": 1,
+                                                             "employee_id": 1},
+                                                 return_document=ReturnDocument.BEFORE)
+        except DuplicateKeyError:
+            raise ServiceException(message="Schedule is not available",
+                                   status_code=status.HTTP_400_BAD_REQUEST)
         if not submit:
+            if submits.find_one({"_id": ObjectId(submit_id)}, {"_id": 1}):
+                raise ServiceException(message="User is not authorized for this action",
+                                       status_code=status.HTTP_403_FORBIDDEN)
             raise ServiceException(message="Service submit not found", status_code=status.HTTP_400_BAD_REQUEST)
-        if str(user_id) != submit.user_id:
-            raise ServiceException(message="User is not authorized for this action",
-                                   status_code=status.HTTP_403_FORBIDDEN)
-
-        new_date = datetime.fromisoformat(new_date)
-        exists_submit = CarServiceScheduleSubmit.objects.filter(date=new_date, schedule_id=submit.schedule_id).first()
-        if exists_submit:
-            raise ServiceException(message="Schedule is not available",
-                                   status_code=status.HTTP_403_FORBIDDEN)
 
-        submit.date = new_date
-        submit.car_id = car_id
-        submit.save()
+        old_date = submit["date"]
+        availability_cache.invalidate_day(submit["service_id"], old_date)
+        availability_cache.invalidate_day(submit["service_id"], new_date)
+        service = get_loader().load(CarService, submit["service_id"])
+        if service:
+            analytics_rollup.booking_moved(service.detailer_id, old_date, new_date, submit["user_id"],
+                                           submit.get("employee_id"))
 
     def add_service(self, user_id: int, user_role_id: int, service_data: dict[str, Any]):
         user_role_id = ObjectId(user_role_id)
-        detailer_role = Role.objects.filter(name="detailer").first()
+        detailer_role = role_registry.get_by_name("detailer")
         if not detailer_role:
             raise ServiceException(message="Detailer role not found, db error",
                                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -169,24 +371,33 @@ class CarServiceManager:
             raise ServiceException(message="User has invalid role to add service",
                                    status_code=status.HTTP_400_BAD_REQUEST)
 
-        if "image_file" in service_data and service_data["image_file"] is not None:
+        # multipart uploads arrive as a file, the older JSON clients send a base64 data URL
+        image = service_data.get("image")
+        if not image and service_data.get("image_file"):
             format, imgstr = service_data["image_file"].split(';base64,')
             ext = format.split('/')[-1]
             image = ContentFile(base64.b64decode(imgstr), name=f'{uuid.uuid4()}.' + ext)
-        else:
-            image = None
+        images = image_pipeline.process(image) if image else {}
+
+        service_days = service_data.get("service_days") or []
+        if isinstance(service_days, str):
+            try:
+                service_days = json.loads(service_days)
+            except ValueError:
+                raise ServiceException(message="Invalid service_days", status_code=status.HTTP_400_BAD_REQUEST)
 
         car_service = CarService(name=service_data["name"],
                                  description=service_data["description"],
                                  duration=service_data["duration"],
                                  price=service_data["price"],
-                                 image=image,
-                                 detailer_id=user_id)
+                                 detailer_id=user_id,
+                                 **images)
         car_service.save()
 
-        if "service_days" in service_data:
-            for d in service_data["service_days"]:
+        if service_days:
+            for d in service_days:
                 CarServiceSchedule(service_id=car_service._id, day_of_week=d["day"], time=d["time"]).save()
+        availability_cache.invalidate_service(car_service._id)
 
     def remove_car(self, user_id: int, car_id: str):
         car = Car.objects.filter(_id=ObjectId(car_id), user_id=str(user_id)).first()
@@ -200,42 +411,80 @@ class CarServiceManager:
         car.is_removed = True
         car.save()
 
-    def get_all_orders(self, detailer_id: int):
-        services = list(CarService.objects.filter(detailer_id=detailer_id))
-        service_map = {str(service._id): service for service in services}
-
-        submits = list(CarServiceScheduleSubmit.objects.filter(service_id__in=service_map.keys()))
-
-        user_ids = {submit.user_id for submit in submits}
-        car_ids = {ObjectId(submit.car_id) for submit in submits}
-        status_ids = {ObjectId(submit.status_id) for submit in submits}
-
-        users = {user.id: user for user in AppUser.objects.filter(id__in=user_ids)}
-        cars = {str(car._id): car for car in Car.objects.filter(_id__in=car_ids)}
-        statuses = {str(status._id): status for status in SubmitStatus.objects.filter(_id__in=status_ids)}
-
-        result = []
-        for submit in submits:
-            client = users.get(int(submit.user_id))
-            car = cars.get(submit.car_id)
-            service = service_map.get(submit.service_id)
-            status = statuses.get(submit.status_id)
-
-            if client and car and service and status:
-                result.append({
-                    "id": str(submit._id),
-                    "client_id": submit.user_id,
-                    "client_phone": client.phone,
-                    "client_full_name": client.first_name + " " + client.last_name,
-                    "car": car.manufacturer + " " + car.model,
-                    "service_name": service.name,
-                    "service_id": str(service._id),
-                    "service_price": service.price,
-                    "due_date": submit.date.strftime("%Y-%m-%d %H:%M"),
-                    "status_id": str(status._id),
-                    "employee_id": submit.employee_id
-                })
-        return result
+    def get_all_orders(self, detailer_id: int, filters: dict[str, str] = None):
+        filters = filters or {}
+        service_map = service_index.get(detailer_id)
+
+        service_ids = list(service_map.keys())
+        if filters.get("service_id"):
+            service_ids = [filters["service_id"]] if filters["service_id"] in service_map else []
+        query = {"service_id": {"$in": service_ids}}
+
+        date_range = {}
+        if filters.get("date_from"):
+            if not is_correct_iso_date(filters["date_from"]):
+                raise ServiceException(message="Invalid date format, use YYYY-MM-DD",
+                                       status_code=status.HTTP_400_BAD_REQUEST)
+            date_range["$gte"] = datetime.fromisoformat(filters["date_from"])
+        if filters.get("date_to"):
+            if not is_correct_iso_date(filters["date_to"]):
+                raise ServiceException(message="Invalid date format, use YYYY-MM-DD",
+                                       status_code=status.HTTP_400_BAD_REQUEST)
+            date_range["$lt"] = datetime.fromisoformat(filters["date_to"]) + timedelta(days=1)
+        if date_range:
+            query["date"] = date_range
+        for field in ("status_id", "employee_id"):
+            if filters.get(field):
+                query[field] = filters[field]
+
+        if filters.get("cursor"):
+            last_date, last_id = decode_keyset_cursor(filters["cursor"])
+            query = {"$and": [query, {"$or": [{"date": {"$gt": last_date}},
+                                              {"date": last_date, "_id": {"$gt": last_id}}]}]}
+
+        try:
+            limit = min(int(filters.get("limit") or settings.ORDERS_PAGE_SIZE), settings.ORDERS_MAX_PAGE_SIZE)
+        except ValueError:
+            raise ServiceException(message="Invalid limit", status_code=status.HTTP_400_BAD_REQUEST)
+        limit = max(limit, 1)
+
+        submits = list(get_collection(CarServiceScheduleSubmit)
+                       .find(query, {"date": 1, "user_id": 1, "car_id": 1, "service_id": 1, "status_id": 1,
+                                     "employee_id": 1})
+                       .sort([("date", ASCENDING), ("_id", ASCENDING)])
+                       .limit(limit + 1))
+        next_cursor = None
+        if len(submits) > limit:
+            submits = submits[:limit]
+            next_cursor = encode_keyset_cursor(submits[-1]["date"], submits[-1]["_id"])
+
+        users = read_repository.users_by_ids({submit["user_id"] for submit in submits})
+        cars = read_repository.cars_by_ids({submit["car_id"] for submit in submits})
+
+        def rows():
+            for submit in submits:
+                client = users.get(submit["user_id"])
+                car = cars.get(submit["car_id"])
+                service = service_map.get(submit["service_id"])
+                status = status_registry.get(submit.get("status_id"))
+
+                if client and car and service and status:
+                    yield {
+                        "id": str(submit["_id"]),
+                        "client_id": submit["user_id"],
+                        "client_phone": client.get("phone"),
+                        "client_full_name": client["first_name"] + " " + client["last_name"],
+                        "car": car["manufacturer"] + " " + car["model"],
+                        "service_name": service["name"],
+                        "service_id": str(service["_id"]),
+                        "service_price": service["price"],
+                        "due_date": submit["date"].strftime("%Y-%m-%d %H:%M"),
+                        "status_id": str(status._id),
+                        "employee_id": submit.get("employee_id")
+                    }
+
+        # the page itself is bounded by limit; rows are built while the response is written
+        return {"results": rows(), "next_cursor": next_cursor}
 
     def remove_employee(self, user_id: int, employee_id: str):
         employee = Employee.objects.filter(_id=ObjectId(employee_id), detailer_id=str(user_id)).first()
@@ -246,75 +495,70 @@ class CarServiceManager:
         employee.save()
 
     def attach_employee(self, user_id: int, submit_id: str, employee_id: str):
+        loader = get_loader()
         submit = self.get_or_error(CarServiceScheduleSubmit, submit_id)
-        schedule = self.get_or_error(CarServiceSchedule, submit.schedule_id)
-        service = self.get_or_error(CarService, schedule.service_id)
+        schedule = loader.get_or_error(CarServiceSchedule, submit.schedule_id)
+        service = loader.get_or_error(CarService, schedule.service_id)
 
         if service.detailer_id != str(user_id):
             raise ServiceException(message="User has not permission to do this action",
                                    status_code=status.HTTP_403_FORBIDDEN)
 
-        self.get_or_error(Employee, employee_id)
+        loader.get_or_error(Employee, employee_id)
+        old_employee_id = submit.employee_id
         submit.employee_id = employee_id
         submit.save()
+        analytics_rollup.employee_reassigned(service.detailer_id, submit.date, old_employee_id, employee_id)
 
     def set_submit_status(self, user_id: int, submit_id: str, status_id: str):
+        loader = get_loader()
         submit = self.get_or_error(CarServiceScheduleSubmit, submit_id)
-        schedule = self.get_or_error(CarServiceSchedule, submit.schedule_id)
-        service = self.get_or_error(CarService, schedule.service_id)
+        schedule = loader.get_or_error(CarServiceSchedule, submit.schedule_id)
+        service = loader.get_or_error(CarService, schedule.service_id)
 
         if service.detailer_id != str(user_id):
             raise ServiceException(message="User has not permission to do this action",
                                    status_code=status.HTTP_403_FORBIDDEN)
 
-        self.get_or_error(SubmitStatus, status_id)
+        if not status_registry.get(status_id):
+            raise ServiceException(message=f"Object of {SubmitStatus} not found",
+                                   status_code=status.HTTP_400_BAD_REQUEST)
 
         submit.status_id = status_id
         submit.save()
 
     def get_detailer_stats(self, detailer_id: int):
-        services = list(CarService.objects.filter(detailer_id=detailer_id))
-        service_map = {str(service._id): service for service in services}
-
-        submits = list(CarServiceScheduleSubmit.objects.filter(service_id__in=service_map.keys()))
-
-        pending_status_id = str(self.get_or_error(SubmitStatus, name="pending")._id)
-        in_progress_status_id = str(self.get_or_error(SubmitStatus, name="in progress")._id)
-        done_status_id = str(self.get_or_error(SubmitStatus, name="done")._id)
-
-        def count_status(status_id: str):
-            return len([o for o in submits if o.status_id == status_id])
-
-        return {
-            "pending_count": count_status(pending_status_id),
-            "in_progress_count": count_status(in_progress_status_id),
-            "done_count": count_status(done_status_id),
-        }
+        service_ids = service_index.service_ids(detailer_id)
+
+        counts = {row["_id"]: row["count"] for row in get_collection(CarServiceScheduleSubmit).aggregate([
+            {"$match": {"service_id": {"$in": service_ids}}},
+            {"$group": {"_id": "$status_id", "count": {"$sum": 1}}}
+        ])}
+
+        result = {"pending_count": 0, "in_progress_count": 0, "done_count": 0}
+        statuses = []
+        for submit_status in status_registry.all():
+            count = counts.get(str(submit_status._id), 0)
+            result[submit_status.name.replace(" ", "_") + "_count"] = count
+            statuses.append({"status_id": str(submit_status._id), "name": submit_status.name, "count": count})
+        result["statuses"] = statuses
+        return result
 
     def get_analytics(self, detailer_id: int, date_from: str, date_to: str):
-        services = list(CarService.objects.filter(detailer_id=detailer_id))
-        service_map = {str(service._id): service for service in services}
-
-        submits = list(CarServiceScheduleSubmit.objects.filter(service_id__in=service_map.keys(),
-                                                               date__gte=date_from,
-                                                               date__lte=date_to))
-
-        orders = defaultdict(int)
-        employees = defaultdict(int)
-        clients = defaultdict(int)
-        for submit in submits:
-            date_str = submit.date.isoformat().split("T")[0]
-            orders[date_str] += 1
-            if submit.employee_id:
-                employees[submit.employee_id] += 1
-            if submit.user_id:
-                clients[submit.user_id] += 1
+        if not is_correct_iso_date(date_from) or not is_correct_iso_date(date_to):
+            raise ServiceException(message="Invalid date format, use YYYY-MM-DD",
+                                   status_code=status.HTTP_400_BAD_REQUEST)
 
-        employees_db = Employee.objects.filter(_id__in=[ObjectId(emp_id) for emp_id in employees.keys()])
-        employees_map = {str(emp._id): emp for emp in employees_db}
+        services = read_repository.services_by_ids(service_index.service_ids(detailer_id), ("name", "view_count"))
+        orders, employees, clients = analytics_rollup.read(detailer_id,
+                                                           datetime.fromisoformat(date_from).date(),
+                                                           datetime.fromisoformat(date_to).date())
 
-        clients_db = AppUser.objects.filter(id__in=clients.keys())
-        clients_map = {str(cli.id): cli for cli in clients_db}
+        loader = get_loader()
+        employees_map = loader.load_many(Employee, employees.keys())
+        clients_map = loader.load_many(AppUser, clients.keys())
+        view_counts = {service_id: ser.get("view_count", 0) + view_counter.pending(service_id)
+                       for service_id, ser in services.items()}
 
         def full_name(emp):
             if not emp.first_name:
@@ -324,67 +568,168 @@ class CarServiceManager:
         return {
             "orders": [{"date": date, "count": count} for date, count in orders.items()],
             "employees": [{"employee_id": emp_id, "employee": full_name(employees_map[emp_id]), "count": count} for
-                          emp_id, count in employees.items()],
+                          emp_id, count in employees.items() if emp_id in employees_map],
             "clients": [{"client_id": cli_id, "client": full_name(clients_map[cli_id]), "count": count} for
-                        cli_id, count in clients.items()],
-            "services": [{"service_id": str(ser._id), "service": ser.name, "view_count": ser.view_count} for ser in
-                         services if ser.view_count > 0]
+                        cli_id, count in clients.items() if cli_id in clients_map],
+            "services": [{"service_id": service_id, "service": ser["name"], "view_count": view_counts[service_id]}
+                         for service_id, ser in services.items() if view_counts[service_id] > 0]
         }
 
-    def get_detailer_clients(self, detailer_id: int):
-        services = list(CarService.objects.filter(detailer_id=detailer_id))
-        service_map = {str(service._id): service for service in services}
-
-        submits = list(CarServiceScheduleSubmit.objects.filter(service_id__in=service_map.keys()))
-        client_ids = [int(s.user_id) for s in submits]
-
-        clients = AppUser.objects.filter(id__in=client_ids)
-        return [{
-            "id": c.id,
-            "email": c.email,
-            "first_name": c.first_name,
-            "last_name": c.last_name,
-            "phone": c.phone,
-            "street": c.street,
-            "city": c.city,
-            "zip_code": c.zip_code
-        } for c in clients]
+    def get_revenue_analytics(self, detailer_id: int, granularity: str, date_from: str, date_to: str):
+        if granularity not in BUCKET_FORMATS:
+            raise ServiceException(message=f"Invalid granularity, use one of: {', '.join(BUCKET_FORMATS)}",
+                                   status_code=status.HTTP_400_BAD_REQUEST)
+        if not is_correct_iso_date(date_from) or not is_correct_iso_date(date_to):
+            raise ServiceException(message="Invalid date format, use YYYY-MM-DD",
+                                   status_code=status.HTTP_400_BAD_REQUEST)
 
-    def get_detailer_client_submits(self, detailer_id: int, client_id: int):
-        services = list(CarService.objects.filter(detailer_id=detailer_id))
-        service_map = {str(service._id): service for service in services}
+        bucket_format = BUCKET_FORMATS[granularity]
+        day_from = datetime.fromisoformat(date_from).date()
+        day_to = datetime.fromisoformat(date_to).date()
+        range_start = datetime(day_from.year, day_from.month, day_from.day)
+        range_end = datetime(day_to.year, day_to.month, day_to.day) + timedelta(days=1)
+        service_ids = service_index.service_ids(detailer_id)
+
+        booked = {row["_id"]: row for row in get_collection(CarServiceScheduleSubmit).aggregate([
+            {"$match": {"service_id": {"$in": service_ids}, "date": {"$gte": range_start, "$lt": range_end}}},
+            {"$addFields": {"service_oid": {"$toObjectId": "$service_id"}}},
+            {"$lookup": {"from": CarService._meta.db_table, "localField": "service_oid", "foreignField": "_id",
+                         "as": "service"}},
+            {"$unwind": "$service"},
+            {"$group": {"_id": {"$dateToString": {"format": bucket_format, "date": "$date"}},
+                        "revenue": {"$sum": "$service.price"},
+                        "booked": {"$sum": 1}}}
+        ], allowDiskUse=True)}
+
+        # the weekly template says how many slots are offered on each day of the week (1 = Monday)
+        slots_per_weekday = {row["_id"]: row["count"] for row in get_collection(CarServiceSchedule).aggregate([
+            {"$match": {"service_id": {"$in": service_ids}}},
+            {"$group": {"_id": "$day_of_week", "count": {"$sum": 1}}}
+        ])}
+        offered = {}
+        day = day_from
+        while day <= day_to:
+            bucket = day.strftime(bucket_format)
+            offered[bucket] = offered.get(bucket, 0) + slots_per_weekday.get(day.isoweekday(), 0)
+            day += timedelta(days=1)
+
+        buckets = []
+        for bucket in sorted(offered.keys() | booked.keys()):
+            row = booked.get(bucket, {})
+            bucket_booked = row.get("booked", 0)
+            bucket_offered = offered.get(bucket, 0)
+            buckets.append({
+                "bucket": bucket,
+                "revenue": round(row.get("revenue", 0.0), 2),
+                "booked": bucket_booked,
+                "offered": bucket_offered,
+                "utilization": round(bucket_booked / bucket_offered, 4) if bucket_offered else None
+            })
 
-        submits = list(CarServiceScheduleSubmit.objects.filter(service_id__in=service_map.keys(),
-                                                               user_id=client_id))
+        total_booked = sum(b["booked"] for b in buckets)
+        total_offered = sum(b["offered"] for b in buckets)
+        return {
+            "granularity": granularity,
+            "buckets": buckets,
+            "total_revenue": round(sum(b["revenue"] for b in buckets), 2),
+            "total_booked": total_booked,
+            "total_offered": total_offered,
+            "utilization": round(total_booked / total_offered, 4) if total_offered else None
+        }
 
-        car_ids = {ObjectId(submit.car_id) for submit in submits}
-        status_ids = {ObjectId(submit.status_id) for submit in submits}
+    def get_detailer_clients(self, detailer_id: int, params: dict[str, str] = None):
+        params = params or {}
+        sort = params.get("sort") or "-last_visit"
+        if sort.lstrip("-") not in CLIENT_SORT_FIELDS:
+            raise ServiceException(message=f"Invalid sort, use one of {', '.join(CLIENT_SORT_FIELDS)}",
+                                   status_code=status.HTTP_400_BAD_REQUEST)
+        try:
+            page = max(int(params.get("page") or 1), 1)
+            limit = min(max(int(params.get("limit") or settings.CLIENTS_PAGE_SIZE), 1),
+                        settings.CLIENTS_MAX_PAGE_SIZE)
+        except ValueError:
+            raise ServiceException(message="Invalid page or limit", status_code=status.HTTP_400_BAD_REQUEST)
+
+        service_map = service_index.get(detailer_id)
+        if not service_map:
+            return {"count": 0, "results": []}
+
+        now = datetime.now(dt_timezone.utc).replace(tzinfo=None)
+        is_visit = {"$lte": ["$date", now]}
+        # prices come from the cached service index instead of a $lookup per submit
+        price = {"$switch": {"branches": [{"case": {"$eq": ["$service_id", service_id]}, "then": service["price"]}
+                                          for service_id, service in service_map.items()],
+                             "default": 0}}
+        facet = next(get_collection(CarServiceScheduleSubmit).aggregate([
+            {"$match": {"service_id": {"$in": list(service_map.keys())}}},
+            {"$group": {"_id": "$user_id",
+                        "visit_count": {"$sum": {"$cond": [is_visit, 1, 0]}},
+                        "last_visit": {"$max": {"$cond": [is_visit, "$date", None]}},
+                        "next_booking": {"$min": {"$cond": [is_visit, None, "$date"]}},
+                        "total_spend": {"$sum": {"$cond": [is_visit, price, 0]}}}},
+            {"$facet": {"results": [{"$sort": {sort.lstrip("-"): -1 if sort.startswith("-") else 1, "_id": 1}},
+                                    {"$skip": (page - 1) * limit},
+                                    {"$limit": limit}],
+                        "total": [{"$count": "count"}]}}
+        ], allowDiskUse=True))
+
+        rows = facet["results"]
+        users = read_repository.users_by_ids(row["_id"] for row in rows)
+
+        def as_utc(value):
+            return value.replace(tzinfo=dt_timezone.utc) if value else None
+
+        results = []
+        for row in rows:
+            c = users.get(row["_id"])
+            if not c:
+                continue
+            results.append({
+                "id": c["id"],
+                "email": c.get("email"),
+                "first_name": c.get("first_name"),
+                "last_name": c.get("last_name"),
+                "phone": c.get("phone"),
+                "street": c.get("street"),
+                "city": c.get("city"),
+                "zip_code": c.get("zip_code"),
+                "visit_count": row["visit_count"],
+                "last_visit": as_utc(row["last_visit"]),
+                "next_booking": as_utc(row["next_booking"]),
+                "total_spend": row["total_spend"]
+            })
+        return {"count": facet["total"][0]["count"] if facet["total"] else 0, "results": results}
 
-        cars = {str(car._id): car for car in Car.objects.filter(_id__in=car_ids)}
-        statuses = {str(status._id): status for status in SubmitStatus.objects.filter(_id__in=status_ids)}
+    def get_detailer_client_submits(self, detailer_id: int, client_id: int):
+        service_map = service_index.get(detailer_id)
 
-        employee_ids = {ObjectId(submit.employee_id) for submit in submits}
-        employees = {str(emp._id): emp for emp in Employee.objects.filter(_id__in=employee_ids)}
+        submits = read_repository.iter_client_submits(service_map.keys(), client_id)
+        return (row for batch in iter_batches(submits, STREAM_BATCH_SIZE)
+                for row in self._client_submit_rows(batch, service_map))
 
-        result = []
-        for submit in submits:
-            car = cars.get(submit.car_id)
-            service = service_map.get(submit.service_id)
-            status = statuses.get(submit.status_id)
-            employee = employees.get(submit.employee_id)
+    @staticmethod
+    def _client_submit_rows(submits: list[dict], service_map: dict[str, dict]) -> Iterator[dict[str, Any]]:
+        cars = read_repository.cars_by_ids({submit["car_id"] for submit in submits})
+        employees = read_repository.employees_by_ids({submit["employee_id"] for submit in submits
+                                                       if submit.get("employee_id")})
 
-            result.append({
-                "id": str(submit._id),
-                "client_id": submit.user_id,
-                "car": car.manufacturer + " " + car.model if car else None,
-                "service_name": service.name,
-                "service_id": str(service._id),
-                "service_price": service.price,
-                "due_date": submit.date.strftime("%Y-%m-%d %H:%M"),
+        for submit in submits:
+            car = cars.get(submit["car_id"])
+            service = service_map.get(submit["service_id"])
+            status = status_registry.get(submit.get("status_id"))
+            employee = employees.get(submit.get("employee_id"))
+
+            yield {
+                "id": str(submit["_id"]),
+                "client_id": submit["user_id"],
+                "car": car["manufacturer"] + " " + car["model"] if car else None,
+                "service_name": service["name"],
+                "service_id": str(service["_id"]),
+                "service_price": service["price"],
+                "due_date": submit["date"].strftime("%Y-%m-%d %H:%M"),
                 "status": status.name if status else None,
-                "employee": employee.first_name + " " + employee.last_name if employee else None
-            })
-        return result
+                "employee": employee["first_name"] + " " + employee["last_name"] if employee else None
+            }
 
     def create_invoice(self, detailer_id: int, invoice_data: dict[str, Any]):
         if "nip" not in invoice_data:
@@ -419,57 +764,85 @@ class CarServiceManager:
 
         invoice.save()
 
+        detailer = get_loader().load(AppUser, detailer_id)
+        if detailer:
+            try:
+                html_content, invoice_number = self.render_invoice_html(invoice, detailer)
+                invoice_render_pool.submit(invoice._id, detailer.id, invoice_number + ".pdf", html_content)
+            except Exception:
+                # pre-rendering is best effort, the invoice is already saved and the download path renders on demand
+                logger.exception("Pre-rendering invoice %s failed", invoice._id)
+
     def get_invoice_file(self, detailer_id: int, invoice_id: str):
         invoice = self.get_or_error(Invoice, invoice_id)
-        detailer = self.get_or_error(AppUser, id=detailer_id)
+        detailer = get_loader().get_or_error(AppUser, detailer_id)
 
         if invoice.detailer_id != str(detailer.id):
             raise ServiceException(message="User has not permission to do this action",
                                    status_code=status.HTTP_403_FORBIDDEN)
 
-        html_content = open("invoice_template.html", encoding="utf-8").read()
-
-        services_html = ""
-        for i, service in enumerate(invoice.services):
-            services_html += f"""<tr>
-              <td style="border: 1px solid #ccc; padding: 8px; text-align: center;">{i + 1}</td>
-              <td style="border: 1px solid #ccc; padding: 8px; text-align: center;">{service["name"]}</td>
-              <td style="border: 1px solid #ccc; padding: 8px; text-align: center;">1</td>
-              <td style="border: 1px solid #ccc; padding: 8px; text-align: center;">szt.</td>
-              <td style="border: 1px solid #ccc; padding: 8px; text-align: center;">{service["price"]:0.2f} zł</td>
-              <td style="border: 1px solid #ccc; padding: 8px; text-align: center;">23</td>
-              <td style="border: 1px solid #ccc; padding: 8px; text-align: center;">{service["price"] * 0.23:0.2f} zł</td>
-              <td style="border: 1px solid #ccc; padding: 8px; text-align: center;">{service["price"] * (1 - 0.23):0.2f} zł</td>
-            </tr>"""
-
-        invoice_number = f"FV/{invoice.date_created.strftime('%Y')}/{invoice.number:04}"
-        invoice_data = {
-            "invoice_number": invoice_number,
-            "invoice_date": invoice.date_created.strftime("%Y-%m-%d"),
-            "detailer_name": detailer.company_name,
-            "detailer_address": detailer.street + " " + detailer.city + " " + detailer.zip_code,
-            "detailer_nip": "" if detailer.nip is None else detailer.nip,
-            "client_name": invoice.first_name + " " + invoice.last_name,
-            "client_address": invoice.street + " " + invoice.zip_code,
-            "client_nip": "" if invoice.nip is None else invoice.nip,
-            "services": services_html,
-            "total_netto": invoice.amount_brutto * (1 - 0.23),
-            "total_vat": invoice.amount_brutto * 0.23,
-            "total_brutto": invoice.amount_brutto,
-        }
-        for key, value in invoice_data.items():
-            html_content = html_content.replace("{{" + key + "}}", str(value))
-        path_to_wkhtmltopdf = os.environ.get("WKHTMLTOPDF_PATH")
-        config = pdfkit.configuration(wkhtmltopdf=path_to_wkhtmltopdf)
-        pdf_file = BytesIO()
-        pdf_output = pdfkit.from_string(html_content, False, configuration=config)
-        pdf_file.write(pdf_output)
-        pdf_file.seek(0)
+        html_content, invoice_number = self.render_invoice_html(invoice, detailer)
+        cache_key = invoice_pdf_cache.key(html_content)
+        pdf_file = invoice_pdf_cache.open(str(invoice._id), cache_key)
+        if pdf_file is None:
+            job = invoice_render_pool.submit(invoice._id, detailer.id, invoice_number + ".pdf", html_content)
+            invoice_render_pool.wait(job, settings.INVOICE_RENDER_TIMEOUT)
+            pdf_file = self.get_rendered_file(job)
         return pdf_file, invoice_number + ".pdf"
 
+    def request_invoice_render(self, detailer_id: int, invoice_id: str) -> dict[str, str | float | None]:
+        invoice = self.get_or_error(Invoice, invoice_id)
+        detailer = get_loader().get_or_error(AppUser, detailer_id)
+
+        if invoice.detailer_id != str(detailer.id):
+            raise ServiceException(message="User has not permission to do this action",
+                                   status_code=status.HTTP_403_FORBIDDEN)
+
+        html_content, invoice_number = self.render_invoice_html(invoice, detailer)
+        return invoice_render_pool.submit(invoice._id, detailer.id, invoice_number + ".pdf", html_content).to_dict()
+
+    def get_render_job(self, detailer_id: int, job_id: str) -> dict[str, str | float | None]:
+        return invoice_render_pool.get_job(job_id, detailer_id).to_dict()
+
+    def get_render_job_file(self, detailer_id: int, job_id: str):
+        job = invoice_render_pool.get_job(job_id, detailer_id)
+        if job.status == "failed":
+            raise ServiceException(message=f"Invoice rendering failed: {job.error}",
+                                   status_code=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        if job.status != "done":
+            # queued or running, the client keeps polling
+            return None, job.to_dict()
+        return self.get_rendered_file(job), job.filename
+
+    def get_rendered_file(self, job: RenderJob):
+        pdf_file = invoice_pdf_cache.open(job.invoice_id, job.cache_key)
+        if pdf_file is None:
+            raise ServiceException(message="Rendered invoice expired, request it again",
+                                   status_code=status.HTTP_404_NOT_FOUND)
+        return pdf_file
+
+    def export_invoices(self, detailer_id: int, date_from: str, date_to: str):
+        if not is_correct_iso_date(date_from) or not is_correct_iso_date(date_to):
+            raise ServiceException(message="Invalid date format, use YYYY-MM-DD",
+                                   status_code=status.HTTP_400_BAD_REQUEST)
+
+        detailer = get_loader().get_or_error(AppUser, detailer_id)
+        range_start = datetime.fromisoformat(date_from)
+        range_end = datetime.fromisoformat(date_to) + timedelta(days=1)
+        invoices = Invoice.objects.filter(detailer_id=str(detailer.id),
+                                          date_created__gte=range_start,
+                                          date_created__lt=range_end).order_by("date_created")
+
+        filename = f"invoices_{range_start.strftime('%Y-%m-%d')}_{date_to}.zip"
+        return invoice_exporter.stream_zip(detailer, invoices.iterator(), self.render_invoice_html), filename
+
+    def render_invoice_html(self, invoice: Invoice, detailer: AppUser) -> tuple[str, str]:
+        return invoice_template.render(invoice, detailer)
+
     def remove_invoice(self, detailer_id: int, employee_id: str):
         invoice = Invoice.objects.filter(_id=ObjectId(employee_id), detailer_id=str(detailer_id)).first()
         if not invoice:
             raise ServiceException(message="Invoice not found",
                                    status_code=status.HTTP_400_BAD_REQUEST)
+        invoice_pdf_cache.purge(str(invoice._id))
         invoice.delete()
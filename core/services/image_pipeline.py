@@ -0,0 +1,94 @@
+import io
+import os
+import uuid
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps, UnidentifiedImageError
+from rest_framework import status
+
+from core.exceptions import ServiceException
+
+# Pillow format name -> file extension kept for the stored original
+ORIGINAL_EXTENSIONS = {"JPEG": "jpg", "PNG": "png", "WEBP": "webp", "GIF": "gif"}
+
+
+class ImagePipeline:
+    """Turns an uploaded service image into the stored original plus bounded display variants."""
+
+    def __init__(self, max_bytes: int, max_size: int, thumbnail_size: int, quality: int):
+        self.max_bytes = max_bytes
+        self.max_size = max_size
+        self.thumbnail_size = thumbnail_size
+        self.quality = quality
+
+    def process(self, upload: File) -> dict[str, File]:
+        """Returns CarService image field name -> file to assign, generated once at upload time."""
+        if upload.size > self.max_bytes:
+            raise ServiceException(message=f"Image is larger than {self.max_bytes // (1024 * 1024)} MB",
+                                   status_code=status.HTTP_400_BAD_REQUEST)
+        image, image_format = self._open(upload)
+        stem = uuid.uuid4().hex
+        upload.seek(0)
+        upload.name = f"{stem}.{ORIGINAL_EXTENSIONS[image_format]}"
+        return {"image": upload, **self._variants(image, stem)}
+
+    def variants(self, original: File) -> dict[str, File]:
+        """Display variants for an already stored original, named after it."""
+        image, _ = self._open(original)
+        return self._variants(image, os.path.splitext(os.path.basename(original.name))[0])
+
+    def _open(self, upload: File) -> tuple[Image.Image, str]:
+        try:
+            upload.seek(0)
+            with Image.open(upload) as probe:
+                image_format = probe.format
+                probe.verify()
+            upload.seek(0)
+            image = Image.open(upload)
+            # JPEG can decode straight at a reduced scale, which is most of the cost for large photos
+            image.draft("RGB", (self.max_size, self.max_size))
+            image = ImageOps.exif_transpose(image)
+            image.load()
+        except (UnidentifiedImageError, Image.DecompressionBombError, OSError, SyntaxError):
+            raise ServiceException(message="Invalid image file", status_code=status.HTTP_400_BAD_REQUEST)
+
+        if image_format not in ORIGINAL_EXTENSIONS:
+            raise ServiceException(message=f"Unsupported image format, use one of {', '.join(ORIGINAL_EXTENSIONS)}",
+                                   status_code=status.HTTP_400_BAD_REQUEST)
+        return image, image_format
+
+    def _variants(self, image: Image.Image, stem: str) -> dict[str, File]:
+        has_alpha = image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info)
+        image = image.convert("RGBA" if has_alpha else "RGB")
+        large = self._bounded(image, self.max_size)
+        thumbnail = self._bounded(large, self.thumbnail_size)
+        return {
+            "image_webp": self._encode(large, "WEBP", f"{stem}.webp"),
+            "thumbnail": self._encode(thumbnail, "PNG" if has_alpha else "JPEG",
+                                      f"{stem}-thumb.{'png' if has_alpha else 'jpg'}"),
+            "thumbnail_webp": self._encode(thumbnail, "WEBP", f"{stem}-thumb.webp"),
+        }
+
+    @staticmethod
+    def _bounded(image: Image.Image, size: int) -> Image.Image:
+        if image.width <= size and image.height <= size:
+            return image
+        bounded = image.copy()
+        bounded.thumbnail((size, size), Image.Resampling.LANCZOS)
+        return bounded
+
+    def _encode(self, image: Image.Image, image_format: str, name: str) -> ContentFile:
+        buffer = io.BytesIO()
+        if image_format == "JPEG":
+            image.save(buffer, image_format, quality=self.quality, optimize=True, progressive=True)
+        elif image_format == "WEBP":
+            image.save(buffer, image_format, quality=self.quality, method=4)
+        else:
+            image.save(buffer, image_format, optimize=True)
+        return ContentFile(buffer.getvalue(), name=name)
+
+
+image_pipeline = ImagePipeline(settings.SERVICE_IMAGE_MAX_BYTES, settings.SERVICE_IMAGE_MAX_SIZE,
+                               settings.SERVICE_THUMBNAIL_SIZE, settings.SERVICE_IMAGE_QUALITY)
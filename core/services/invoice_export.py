@@ -0,0 +1,118 @@
+import csv
+import tempfile
+import time
+import zipfile
+from collections import deque
+from typing import Iterable, Iterator
+
+from django.conf import settings
+from rest_framework import status
+
+from core.exceptions import ServiceException
+from core.models import Invoice, AppUser
+from core.services.invoice_pdf_cache import invoice_pdf_cache
+from core.services.invoice_render_pool import invoice_render_pool
+
+CHUNK_SIZE = 64 * 1024
+
+
+class _ZipStream:
+    # write-only sink, zipfile falls back to data descriptors because it cannot seek or tell
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+class InvoiceExporter:
+    def __init__(self, parallelism: int, render_timeout: float):
+        self.parallelism = parallelism
+        self.render_timeout = render_timeout
+
+    def stream_zip(self, detailer: AppUser, invoices: Iterable[Invoice], render_html) -> Iterator[bytes]:
+        sink = _ZipStream()
+        with tempfile.TemporaryFile(mode="w+", newline="", encoding="utf-8") as summary, \
+                zipfile.ZipFile(sink, mode="w", compression=zipfile.ZIP_DEFLATED) as archive:
+            writer = csv.writer(summary)
+            writer.writerow(["number", "date_created", "first_name", "last_name", "nip", "amount_brutto", "file",
+                             "status"])
+
+            for invoice, job, number in self._render_ahead(detailer, invoices, render_html):
+                filename = number.replace("/", "_") + ".pdf"
+                pdf_file = None
+                if job is not None and job.status == "done":
+                    pdf_file = invoice_pdf_cache.open(job.invoice_id, job.cache_key)
+
+                if pdf_file is None:
+                    writer.writerow([number, invoice.date_created.isoformat(), invoice.first_name, invoice.last_name,
+                                     invoice.nip, invoice.amount_brutto, "", "failed"])
+                    continue
+
+                entry_info = zipfile.ZipInfo(filename, date_time=invoice.date_created.timetuple()[:6])
+                entry_info.compress_type = zipfile.ZIP_DEFLATED
+                with pdf_file, archive.open(entry_info, mode="w", force_zip64=True) as entry:
+                    for chunk in iter(lambda: pdf_file.read(CHUNK_SIZE), b""):
+                        entry.write(chunk)
+                        yield sink.drain()
+                writer.writerow([number, invoice.date_created.isoformat(), invoice.first_name, invoice.last_name,
+                                 invoice.nip, invoice.amount_brutto, filename, "ok"])
+                yield sink.drain()
+
+            summary.seek(0)
+            with archive.open("summary.csv", mode="w", force_zip64=True) as entry:
+                for chunk in iter(lambda: summary.read(CHUNK_SIZE), ""):
+                    entry.write(chunk.encode("utf-8"))
+                    yield sink.drain()
+        yield sink.drain()
+
+    def _render_ahead(self, detailer: AppUser, invoices: Iterable[Invoice], render_html):
+        pending = deque()
+        for invoice in invoices:
+            html_content, number = render_html(invoice, detailer)
+            job = self._submit(invoice, detailer, number, html_content, pending)
+            pending.append((invoice, job, number))
+            while len(pending) >= self.parallelism:
+                yield self._finish(pending.popleft())
+        while pending:
+            yield self._finish(pending.popleft())
+
+    def _submit(self, invoice: Invoice, detailer: AppUser, number: str, html_content: str, pending: deque):
+        deadline = time.monotonic() + self.render_timeout
+        while True:
+            try:
+                return invoice_render_pool.submit(invoice._id, detailer.id, number + ".pdf", html_content)
+            except ServiceException as e:
+                if e.status_code != status.HTTP_503_SERVICE_UNAVAILABLE or time.monotonic() > deadline:
+                    return None
+            # the queue is shared with other requests, wait for a slot instead of failing the export
+            if pending and pending[0][1] is not None and not pending[0][1].future.done():
+                self._wait(pending[0][1])
+            else:
+                time.sleep(0.1)
+
+    def _finish(self, item):
+        invoice, job, number = item
+        if job is not None:
+            self._wait(job)
+        return invoice, job, number
+
+    def _wait(self, job) -> None:
+        if job is None:
+            return
+        try:
+            invoice_render_pool.wait(job, self.render_timeout)
+        except ServiceException:
+            pass
+
+
+invoice_exporter = InvoiceExporter(settings.INVOICE_EXPORT_PARALLELISM, settings.INVOICE_RENDER_TIMEOUT)
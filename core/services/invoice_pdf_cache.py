@@ -0,0 +1,88 @@
+import glob
+import hashlib
+import os
+import tempfile
+import threading
+from typing import BinaryIO
+
+from django.conf import settings
+
+# Bump when the invoice markup generated in code changes, so old PDFs stop matching
+INVOICE_TEMPLATE_VERSION = 2
+
+
+class InvoicePdfCache:
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    def key(self, html_content: str) -> str:
+        digest = hashlib.sha256(f"v{INVOICE_TEMPLATE_VERSION}\n".encode("utf-8"))
+        digest.update(html_content.encode("utf-8"))
+        return digest.hexdigest()
+
+    def _path(self, invoice_id: str, key: str) -> str:
+        return os.path.join(self.directory, f"{invoice_id}-{key}.pdf")
+
+    def open(self, invoice_id: str, key: str) -> BinaryIO | None:
+        path = self._path(invoice_id, key)
+        try:
+            file = open(path, "rb")
+        except FileNotFoundError:
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return file
+
+    def put(self, invoice_id: str, key: str, pdf_content: bytes) -> BinaryIO:
+        os.makedirs(self.directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "wb") as tmp_file:
+            tmp_file.write(pdf_content)
+
+        path = self._path(invoice_id, key)
+        os.replace(tmp_path, path)
+        # opened before eviction, so the caller can still stream it if it gets evicted right away
+        file = open(path, "rb")
+        self._purge(invoice_id, keep=path)
+        self._evict()
+        return file
+
+    def purge(self, invoice_id: str) -> None:
+        self._purge(invoice_id)
+
+    def _purge(self, invoice_id: str, keep: str = None) -> None:
+        for path in glob.glob(os.path.join(self.directory, f"{glob.escape(str(invoice_id))}-*.pdf")):
+            if path != keep:
+                self._remove(path)
+
+    def _evict(self) -> None:
+        with self._lock:
+            entries = []
+            total = 0
+            with os.scandir(self.directory) as it:
+                for entry in it:
+                    if entry.name.endswith(".pdf") and entry.is_file():
+                        stat = entry.stat()
+                        entries.append((stat.st_mtime, stat.st_size, entry.path))
+                        total += stat.st_size
+
+            # least recently served first
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                self._remove(path)
+                total -= size
+
+    @staticmethod
+    def _remove(path: str) -> None:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+invoice_pdf_cache = InvoicePdfCache(settings.INVOICE_PDF_CACHE_DIR, settings.INVOICE_PDF_CACHE_MAX_BYTES)
@@ -0,0 +1,159 @@
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, Future
+
+import pdfkit
+from django.conf import settings
+from rest_framework import status
+
+from core.exceptions import ServiceException
+from core.services.invoice_pdf_cache import invoice_pdf_cache
+
+logger = logging.getLogger(__name__)
+
+
+def render_pdf(html_content: str) -> bytes:
+    path_to_wkhtmltopdf = os.environ.get("WKHTMLTOPDF_PATH")
+    config = pdfkit.configuration(wkhtmltopdf=path_to_wkhtmltopdf)
+    return pdfkit.from_string(html_content, False, configuration=config)
+
+
+class RenderJob:
+    def __init__(self, invoice_id: str, detailer_id: str, filename: str, cache_key: str):
+        self.job_id = uuid.uuid4().hex
+        self.invoice_id = invoice_id
+        self.detailer_id = detailer_id
+        self.filename = filename
+        self.cache_key = cache_key
+        self.status = "queued"
+        self.error = None
+        self.render_seconds = None
+        self.future = Future()
+
+    def to_dict(self) -> dict[str, str | float | None]:
+        return {
+            "job_id": self.job_id,
+            "invoice_id": self.invoice_id,
+            "status": self.status,
+            "error": self.error,
+            "render_ms": None if self.render_seconds is None else round(self.render_seconds * 1000, 1)
+        }
+
+
+class InvoiceRenderPool:
+    def __init__(self, workers: int, max_queue: int, max_jobs: int):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.max_jobs = max_jobs
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="invoice-render")
+        self._slots = threading.BoundedSemaphore(workers + max_queue)
+        self._jobs = OrderedDict()
+        # (invoice_id, cache_key) -> queued or running job, so repeat requests share one render
+        self._in_flight = {}
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._running = 0
+        self._completed = 0
+        self._failed = 0
+        self._rejected = 0
+        self._render_seconds_total = 0.0
+        self._render_seconds_max = 0.0
+
+    def submit(self, invoice_id: str, detailer_id: str, filename: str, html_content: str) -> RenderJob:
+        job = RenderJob(str(invoice_id), str(detailer_id), filename, invoice_pdf_cache.key(html_content))
+
+        cached = invoice_pdf_cache.open(job.invoice_id, job.cache_key)
+        if cached is not None:
+            cached.close()
+            job.status = "done"
+            job.future.set_result(job)
+            self._remember(job)
+            return job
+
+        with self._lock:
+            in_flight = self._in_flight.get((job.invoice_id, job.cache_key))
+            if in_flight is not None:
+                return in_flight
+            if not self._slots.acquire(blocking=False):
+                self._rejected += 1
+                raise ServiceException(message="Invoice render queue is full, try again later",
+                                       status_code=status.HTTP_503_SERVICE_UNAVAILABLE)
+            self._queued += 1
+            self._in_flight[(job.invoice_id, job.cache_key)] = job
+        self._remember(job)
+        self._executor.submit(self._render, job, html_content)
+        return job
+
+    def get_job(self, job_id: str, detailer_id: str) -> RenderJob:
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if not job or job.detailer_id != str(detailer_id):
+            raise ServiceException(message="Render job not found", status_code=status.HTTP_404_NOT_FOUND)
+        return job
+
+    def wait(self, job: RenderJob, timeout: float) -> RenderJob:
+        try:
+            job.future.result(timeout=timeout)
+        except TimeoutError:
+            raise ServiceException(message="Invoice rendering timed out",
+                                   status_code=status.HTTP_503_SERVICE_UNAVAILABLE)
+        if job.status != "done":
+            raise ServiceException(message="Invoice rendering failed",
+                                   status_code=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        return job
+
+    def metrics(self) -> dict[str, int | float]:
+        with self._lock:
+            rendered = self._completed + self._failed
+            return {
+                "workers": self.workers,
+                "max_queue": self.max_queue,
+                "queue_depth": self._queued,
+                "running": self._running,
+                "completed": self._completed,
+                "failed": self._failed,
+                "rejected": self._rejected,
+                "avg_render_ms": round(self._render_seconds_total / rendered * 1000, 1) if rendered else 0.0,
+                "max_render_ms": round(self._render_seconds_max * 1000, 1)
+            }
+
+    def _remember(self, job: RenderJob) -> None:
+        with self._lock:
+            self._jobs[job.job_id] = job
+            while len(self._jobs) > self.max_jobs:
+                self._jobs.popitem(last=False)
+
+    def _render(self, job: RenderJob, html_content: str) -> None:
+        with self._lock:
+            self._queued -= 1
+            self._running += 1
+        job.status = "running"
+        started = time.perf_counter()
+        try:
+            invoice_pdf_cache.put(job.invoice_id, job.cache_key, render_pdf(html_content)).close()
+            job.status = "done"
+        except Exception as e:
+            logger.exception("Rendering invoice %s failed", job.invoice_id)
+            job.status = "failed"
+            job.error = str(e)
+        finally:
+            job.render_seconds = time.perf_counter() - started
+            with self._lock:
+                self._in_flight.pop((job.invoice_id, job.cache_key), None)
+                self._running -= 1
+                if job.status == "done":
+                    self._completed += 1
+                else:
+                    self._failed += 1
+                self._render_seconds_total += job.render_seconds
+                self._render_seconds_max = max(self._render_seconds_max, job.render_seconds)
+            self._slots.release()
+            job.future.set_result(job)
+
+
+invoice_render_pool = InvoiceRenderPool(settings.INVOICE_RENDER_WORKERS, settings.INVOICE_RENDER_MAX_QUEUE,
+                                        settings.INVOICE_RENDER_MAX_JOBS)
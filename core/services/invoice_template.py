@@ -0,0 +1,86 @@
+import html
+import os
+import re
+import threading
+
+from django.conf import settings
+
+from core.models import Invoice, AppUser
+
+PLACEHOLDER = re.compile(r"\{\{(\w+)\}\}")
+
+VAT_RATE = 0.23
+
+SERVICE_ROW = """<tr>
+              <td style="border: 1px solid #ccc; padding: 8px; text-align: center;">{index}</td>
+              <td style="border: 1px solid #ccc; padding: 8px; text-align: center;">{name}</td>
+              <td style="border: 1px solid #ccc; padding: 8px; text-align: center;">1</td>
+              <td style="border: 1px solid #ccc; padding: 8px; text-align: center;">szt.</td>
+              <td style="border: 1px solid #ccc; padding: 8px; text-align: center;">{price:0.2f} zł</td>
+              <td style="border: 1px solid #ccc; padding: 8px; text-align: center;">23</td>
+              <td style="border: 1px solid #ccc; padding: 8px; text-align: center;">{vat:0.2f} zł</td>
+              <td style="border: 1px solid #ccc; padding: 8px; text-align: center;">{netto:0.2f} zł</td>
+            </tr>"""
+
+
+class CompiledTemplate:
+    def __init__(self, source: str):
+        # split() alternates literal text and placeholder names: [text, name, text, name, ..., text]
+        parts = PLACEHOLDER.split(source)
+        self.literals = parts[0::2]
+        self.names = parts[1::2]
+
+    def render(self, values: dict[str, str]) -> str:
+        out = [self.literals[0]]
+        for name, literal in zip(self.names, self.literals[1:]):
+            out.append(values[name] if name in values else "{{" + name + "}}")
+            out.append(literal)
+        return "".join(out)
+
+
+class InvoiceTemplate:
+    def __init__(self, path: str):
+        self.path = path
+        self._compiled = None
+        self._signature = None
+        self._lock = threading.Lock()
+
+    def compiled(self) -> CompiledTemplate:
+        stat = os.stat(self.path)
+        signature = (stat.st_mtime_ns, stat.st_size)
+        if signature != self._signature:
+            with self._lock:
+                if signature != self._signature:
+                    with open(self.path, encoding="utf-8") as template_file:
+                        self._compiled = CompiledTemplate(template_file.read())
+                    self._signature = signature
+        return self._compiled
+
+    def render(self, invoice: Invoice, detailer: AppUser) -> tuple[str, str]:
+        services_html = "".join(SERVICE_ROW.format(index=i + 1,
+                                                   name=html.escape(str(service["name"])),
+                                                   price=service["price"],
+                                                   vat=service["price"] * VAT_RATE,
+                                                   netto=service["price"] * (1 - VAT_RATE))
+                                for i, service in enumerate(invoice.services))
+
+        invoice_number = f"FV/{invoice.date_created.strftime('%Y')}/{invoice.number:04}"
+        values = {
+            "invoice_number": invoice_number,
+            "invoice_date": invoice.date_created.strftime("%Y-%m-%d"),
+            "detailer_name": detailer.company_name,
+            "detailer_address": " ".join(filter(None, (detailer.street, detailer.city, detailer.zip_code))),
+            "detailer_nip": "" if detailer.nip is None else detailer.nip,
+            "client_name": invoice.first_name + " " + invoice.last_name,
+            "client_address": invoice.street + " " + invoice.zip_code,
+            "client_nip": "" if invoice.nip is None else invoice.nip,
+            "total_netto": invoice.amount_brutto * (1 - VAT_RATE),
+            "total_vat": invoice.amount_brutto * VAT_RATE,
+            "total_brutto": invoice.amount_brutto,
+        }
+        values = {key: html.escape(str(value)) for key, value in values.items()}
+        values["services"] = services_html
+        return self.compiled().render(values), invoice_number
+
+
+invoice_template = InvoiceTemplate(settings.INVOICE_TEMPLATE_PATH)
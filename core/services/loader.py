@@ -0,0 +1,79 @@
+import contextvars
+from collections import defaultdict
+from typing import Iterable
+
+from bson import ObjectId
+from bson.errors import InvalidId
+from rest_framework import status
+
+from core.exceptions import ServiceException
+from core.models import AppUser
+
+_current_loader = contextvars.ContextVar("batch_loader", default=None)
+
+
+class BatchLoader:
+    def __init__(self):
+        self._objects = defaultdict(dict)
+        self._pending = defaultdict(set)
+
+    @staticmethod
+    def _key_field(model_class) -> str:
+        return "id" if model_class is AppUser else "_id"
+
+    @staticmethod
+    def _to_db_key(model_class, object_id):
+        return int(object_id) if model_class is AppUser else ObjectId(object_id)
+
+    def prime(self, model_class, object_ids: Iterable) -> None:
+        known = self._objects[model_class]
+        for object_id in object_ids:
+            if object_id is None or object_id == "":
+                continue
+            if str(object_id) not in known:
+                self._pending[model_class].add(str(object_id))
+
+    def load_many(self, model_class, object_ids: Iterable) -> dict:
+        object_ids = [str(object_id) for object_id in object_ids if object_id is not None and object_id != ""]
+        self.prime(model_class, object_ids)
+        self._fetch(model_class)
+        known = self._objects[model_class]
+        return {object_id: known[object_id] for object_id in object_ids if known.get(object_id) is not None}
+
+    def load(self, model_class, object_id):
+        if object_id is None or object_id == "":
+            return None
+        return self.load_many(model_class, [object_id]).get(str(object_id))
+
+    def get_or_error(self, model_class, object_id):
+        obj = self.load(model_class, object_id)
+        if not obj:
+            raise ServiceException(message=f"Object of {model_class} not found",
+                                   status_code=status.HTTP_400_BAD_REQUEST)
+        return obj
+
+    def _fetch(self, model_class) -> None:
+        pending = self._pending.pop(model_class, set())
+        if not pending:
+            return
+
+        known = self._objects[model_class]
+        db_keys = []
+        for object_id in pending:
+            # unknown ids are remembered as missing so they are not queried again
+            known[object_id] = None
+            try:
+                db_keys.append(self._to_db_key(model_class, object_id))
+            except (InvalidId, TypeError, ValueError):
+                pass
+
+        if db_keys:
+            key_field = self._key_field(model_class)
+            for obj in model_class.objects.filter(**{f"{key_field}__in": db_keys}):
+                known[str(getattr(obj, key_field))] = obj
+
+
+def get_loader() -> BatchLoader:
+    loader = _current_loader.get()
+    return loader if loader is not None else BatchLoader()
+
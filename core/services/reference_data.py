@@ -0,0 +1,59 @@
+import threading
+import time
+
+from bson import ObjectId
+from django.conf import settings
+from django.db.models.signals import post_save, post_delete
+
+from core.models import Role, SubmitStatus
+
+
+class ReferenceRegistry:
+    def __init__(self, model_class, ttl: float):
+        self.model_class = model_class
+        self.ttl = ttl
+        self.version = 0
+        self._loaded_version = None
+        self._loaded_at = 0.0
+        self._by_id = {}
+        self._by_name = {}
+        self._lock = threading.Lock()
+
+    def bump_version(self, **kwargs) -> None:
+        with self._lock:
+            self.version += 1
+
+    def _ensure_loaded(self) -> None:
+        if self._loaded_version == self.version and time.monotonic() - self._loaded_at < self.ttl:
+            return
+        with self._lock:
+            if self._loaded_version == self.version and time.monotonic() - self._loaded_at < self.ttl:
+                return
+            version = self.version
+            objects = list(self.model_class.objects.all())
+            self._by_id = {str(obj._id): obj for obj in objects}
+            self._by_name = {obj.name: obj for obj in objects}
+            self._loaded_at = time.monotonic()
+            self._loaded_version = version
+
+    def get(self, object_id: str | ObjectId | None):
+        if object_id is None:
+            return None
+        self._ensure_loaded()
+        return self._by_id.get(str(object_id))
+
+    def get_by_name(self, name: str):
+        self._ensure_loaded()
+        return self._by_name.get(name)
+
+    def all(self) -> list:
+        self._ensure_loaded()
+        return list(self._by_id.values())
+
+
+role_registry = ReferenceRegistry(Role, settings.REFERENCE_DATA_TTL)
+status_registry = ReferenceRegistry(SubmitStatus, settings.REFERENCE_DATA_TTL)
+
+for registry in (role_registry, status_registry):
+    post_save.connect(registry.bump_version, sender=registry.model_class, weak=False)
+    post_delete.connect(registry.bump_version, sender=registry.model_class, weak=False)
@@ -0,0 +1,66 @@
+import time
+
+from django.conf import settings
+from django.db.models.signals import post_save, post_delete
+
+from core.caching import LRUCache, MISSING
+from core.db import get_database
+from core.models import CarService
+from core.repositories import read_repository
+from core.services.availability_cache import availability_cache
+
+SERVICE_INDEX_FIELDS = ("name", "price", "duration", "label_color")
+# per-detailer version counters shared by all workers, bumped on every service write
+VERSION_COLLECTION = "core_serviceindexversion"
+
+
+class DetailerServiceIndex:
+    def __init__(self, max_size: int, ttl: float, version_check_interval: float):
+        self.cache = LRUCache(max_size, ttl)
+        self.version_check_interval = version_check_interval
+
+    def collection(self):
+        return get_database()[VERSION_COLLECTION]
+
+    def _shared_version(self, detailer_id: str) -> int:
+        row = self.collection().find_one({"_id": detailer_id}, {"version": 1})
+        return row["version"] if row else 0
+
+    def get(self, detailer_id) -> dict[str, dict]:
+        detailer_id = str(detailer_id)
+        entry = self.cache.get(detailer_id)
+        now = time.monotonic()
+        if entry is not MISSING and now - entry[1] < self.version_check_interval:
+            return entry[2]
+        # an _id lookup instead of the service scan; a write in any worker changes the version
+        version = self._shared_version(detailer_id)
+        if entry is not MISSING and entry[0] == version:
+            self.cache.set(detailer_id, (version, now, entry[2]))
+            return entry[2]
+        services = {str(row["_id"]): row for row in
+                    read_repository.find_services({"detailer_id": detailer_id}, SERVICE_INDEX_FIELDS)}
+        self.cache.set(detailer_id, (version, now, services))
+        return services
+
+    def service_ids(self, detailer_id) -> list[str]:
+        return list(self.get(detailer_id).keys())
+
+    def invalidate(self, detailer_id) -> None:
+        self.collection().update_one({"_id": str(detailer_id)}, {"$inc": {"version": 1}}, upsert=True)
+        self.cache.delete(str(detailer_id))
+
+    def stats(self) -> dict[str, int | float | None]:
+        return self.cache.stats()
+
+
+service_index = DetailerServiceIndex(settings.SERVICE_INDEX_CACHE_SIZE, settings.SERVICE_INDEX_CACHE_TTL,
+                                     settings.SERVICE_INDEX_VERSION_CHECK_INTERVAL)
+
+
+def _service_changed(sender, instance: CarService, **kwargs) -> None:
+    service_index.invalidate(instance.detailer_id)
+    availability_cache.invalidate_service(instance._id)
+
+
+post_save.connect(_service_changed, sender=CarService, weak=False)
+post_delete.connect(_service_changed, sender=CarService, weak=False)
@@ -0,0 +1,52 @@
+from collections import defaultdict
+from datetime import datetime, timedelta, date, time
+from typing import Iterable, Iterator
+
+from core.repositories import read_repository, as_time
+
+
+class SlotEngine:
+    def load_week(self, service_ids: Iterable[str]) -> dict[str, dict[int, list[tuple[str, time]]]]:
+        week = defaultdict(lambda: defaultdict(list))
+        for schedule in read_repository.schedules_for_services(service_ids):
+            week[str(schedule["service_id"])][schedule["day_of_week"]].append((str(schedule["_id"]),
+                                                                               as_time(schedule["time"])))
+        return week
+
+    def load_taken(self, schedule_ids: Iterable[str] | None, day_from: date, day_to: date) -> set[tuple[str, date]]:
+        range_start = datetime(day_from.year, day_from.month, day_from.day)
+        range_end = datetime(day_to.year, day_to.month, day_to.day) + timedelta(days=1)
+
+        # None means "every schedule", which is cheaper as a plain date range scan than a huge $in
+        if schedule_ids is not None:
+            schedule_ids = [str(s) for s in schedule_ids]
+            if not schedule_ids:
+                return set()
+        return {(str(submit["schedule_id"]), submit["date"].date())
+                for submit in read_repository.taken_slots(schedule_ids, range_start, range_end)}
+
+    def iter_days(self, services: list[dict], week: dict[str, dict[int, list[tuple[str, time]]]],
+                  taken: set[tuple[str, date]], day_from: date, day_to: date,
+                  not_before: datetime) -> Iterator[tuple[date, list[tuple[datetime, dict]]]]:
+        day = day_from
+        while day <= day_to:
+            slots = []
+            for service in services:
+                for schedule_id, schedule_time in week.get(str(service["_id"]), {}).get(day.isoweekday(), []):
+                    if (schedule_id, day) in taken:
+                        continue
+                    start = datetime(day.year, day.month, day.day, schedule_time.hour,
+                                     schedule_time.minute, schedule_time.second)
+                    if start >= not_before:
+                        slots.append((start, service))
+            yield day, slots
+            day += timedelta(days=1)
+
+    def format_slot(self, start: datetime, service: dict) -> dict[str, str]:
+        end = start + timedelta(minutes=service.get("duration", 0))
+        return {
+            "text": start.strftime("%H:%M") + " " + service["name"],
+            "start": start.strftime("%Y-%m-%dT%H:%M:%S"),
+            "end": end.strftime("%Y-%m-%dT%H:%M:%S"),
+            "backColor": service.get("label_color", "#6aa84f")
+        }
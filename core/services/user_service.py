@@ -1,13 +1,13 @@
-from bson import ObjectId
 from rest_framework import status
 
 from core.exceptions import ServiceException
-from core.models import AppUser, Role
+from core.models import AppUser
+from core.services.reference_data import role_registry
 
 
 class UserManager:
     def get_role(self, user: 'AppUser'):
-        role = Role.objects.filter(_id=ObjectId(user.role_id)).first()
+        role = role_registry.get(user.role_id)
         if not role:
             raise ServiceException(message="Invalid user role", status_code=status.HTTP_400_BAD_REQUEST)
         return {
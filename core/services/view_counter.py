@@ -0,0 +1,60 @@
+import atexit
+import logging
+import threading
+import time
+from collections import Counter
+
+from bson import ObjectId
+from django.conf import settings
+from pymongo import UpdateOne
+
+from core.db import get_collection
+from core.models import CarService
+
+logger = logging.getLogger(__name__)
+
+
+class ViewCounter:
+    def __init__(self, flush_interval: float):
+        self.flush_interval = flush_interval
+        self._counts = Counter()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._flusher = None
+
+    def increment(self, service_id: str | ObjectId) -> None:
+        with self._lock:
+            self._counts[str(service_id)] += 1
+            if self._flusher is None:
+                self._flusher = threading.Thread(target=self._run, name="view-counter-flush", daemon=True)
+                self._flusher.start()
+
+    def pending(self, service_id: str | ObjectId) -> int:
+        with self._lock:
+            return self._counts.get(str(service_id), 0)
+
+    def flush(self) -> None:
+        with self._flush_lock:
+            with self._lock:
+                counts, self._counts = self._counts, Counter()
+            if not counts:
+                return
+
+            try:
+                get_collection(CarService).bulk_write(
+                    [UpdateOne({"_id": ObjectId(service_id)}, {"$inc": {"view_count": count}})
+                     for service_id, count in counts.items()],
+                    ordered=False)
+            except Exception:
+                logger.exception("Failed to flush %d service view counts", len(counts))
+                with self._lock:
+                    self._counts.update(counts)
+
+    def _run(self) -> None:
+        while True:
+            time.sleep(self.flush_interval)
+            self.flush()
+
+
+view_counter = ViewCounter(settings.VIEW_COUNT_FLUSH_INTERVAL)
+atexit.register(view_counter.flush)
@@ -0,0 +1,38 @@
+import hashlib
+import os
+import re
+
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+
+# "<stem>.<12 hex digits><ext>", the same shape ManifestStaticFilesStorage gives static files
+HASHED_NAME = re.compile(r"\.[0-9a-f]{12}(\.[^./]+)?$")
+
+
+def is_hashed_name(name: str) -> bool:
+    return bool(HASHED_NAME.search(name))
+
+
+class ContentHashedStorage(FileSystemStorage):
+    """Media storage that names every file after a hash of its content, so a URL never changes meaning."""
+
+    def hashed_name(self, name: str, content: File) -> str:
+        if is_hashed_name(name):
+            return name
+        digest = hashlib.sha256()
+        for chunk in content.chunks():
+            digest.update(chunk)
+        content.seek(0)
+        stem, ext = os.path.splitext(name)
+        return f"{stem}.{digest.hexdigest()[:12]}{ext}"
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, "chunks"):
+            content = File(content, name)
+        name = self.hashed_name(self.get_valid_name(name), content)
+        # identical content is already stored under this name
+        if self.exists(name):
+            return name
+        return super().save(name, content, max_length=max_length)
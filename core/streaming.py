@@ -0,0 +1,103 @@
+import logging
+from itertools import chain, islice
+from typing import Any, Iterable, Iterator
+
+from django.http import StreamingHttpResponse
+
+from core.renderers import dumps
+from core.services.loader import BatchLoader, _current_loader
+
+logger = logging.getLogger(__name__)
+
+# flush to the socket in chunks of roughly this many bytes
+STREAM_CHUNK_SIZE = 64 * 1024
+# array items encoded together before any of them is written
+STREAM_ENCODE_BATCH = 500
+
+
+def iter_batches(iterable: Iterable, size: int) -> Iterator[list]:
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+class JSONStreamEncoder:
+    """Encodes values the way the API renderer does, but lets lists arrive as iterators."""
+
+    def iter_encode(self, value: Any) -> Iterator[bytes]:
+        if isinstance(value, dict):
+            yield b"{"
+            for position, (key, item) in enumerate(value.items()):
+                yield (b"," if position else b"") + dumps(str(key)) + b":"
+                yield from self.iter_encode(item)
+            yield b"}"
+        elif isinstance(value, Iterator):
+            # a batch is fully encoded before its first byte is written, so a failing item never
+            # leaves half an object behind
+            opening = b"["
+            for batch in iter_batches(value, STREAM_ENCODE_BATCH):
+                yield opening + b",".join(b"".join(self.iter_encode(item)) for item in batch)
+                opening = b","
+            yield b"[]" if opening == b"[" else b"]"
+        else:
+            yield dumps(value)
+
+    def iter_chunks(self, value: Any) -> Iterator[bytes]:
+        buffer = []
+        buffered = 0
+        for part in self.iter_encode(value):
+            buffer.append(part)
+            buffered += len(part)
+            if buffered >= STREAM_CHUNK_SIZE:
+                yield b"".join(buffer)
+                buffer, buffered = [], 0
+        if buffer:
+            yield b"".join(buffer)
+
+
+def _logged(chunks: Iterator[bytes]) -> Iterator[bytes]:
+    try:
+        yield from chunks
+    except Exception:
+        # the status line is already sent; re-raising makes the server abort the transfer instead of
+        # ending a truncated body cleanly
+        logger.exception("Streaming JSON response failed after the first chunk")
+        raise
+
+
+class StreamingJSONResponse(StreamingHttpResponse):
+    """JSON response whose iterators (at any depth) are written as arrays while they are consumed.
+
+    The first chunk is produced while the view still runs, so errors there get a normal error
+    response; errors after it can no longer change the status code.
+    """
+
+    def __init__(self, data: Any, status: int = 200, **kwargs):
+        kwargs.setdefault("content_type", "application/json")
+        chunks = JSONStreamEncoder().iter_chunks(data)
+        first = next(chunks, b"")
+        super().__init__(chain([first], _logged(chunks)), status=status, **kwargs)
+
+
+class StreamingListMixin:
+    """For unpaginated ListAPIViews: serializes the queryset in batches instead of one list."""
+
+    stream_batch_size = 500
+
+    def list(self, request, *args, **kwargs):
+        if self.paginator is not None:
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.filter_queryset(self.get_queryset())
+
+        def rows():
+            for batch in iter_batches(queryset.iterator(chunk_size=self.stream_batch_size), self.stream_batch_size):
+                # runs after BatchLoaderMiddleware has reset the request's loader, so each batch gets its own
+                token = _current_loader.set(BatchLoader())
+                try:
+                    data = self.get_serializer(batch, many=True).data
+                finally:
+                    _current_loader.reset(token)
+                yield from data
+
+        return StreamingJSONResponse(rows())
@@ -1,3 +1,186 @@
-from django.test import TestCase
+import uuid
+from datetime import datetime, date, time, timedelta, timezone
+from decimal import Decimal
 
-# Create your tests here.
+from bson import ObjectId
+from django.test import SimpleTestCase
+from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+
+from core.exceptions import ServiceException
+from core.pagination import encode_keyset_cursor, decode_keyset_cursor
+from core.renderers import ORJSONRenderer, dumps
+from core.services.slot_engine import SlotEngine
+from core.streaming import JSONStreamEncoder, STREAM_ENCODE_BATCH
+from core.views_media import _byte_range
+
+
+def old_available_schedules(service: dict, schedules: list[dict], submits: list[dict], date_from: datetime,
+                            date_to: datetime, now: datetime) -> list[dict[str, str]]:
+    """The per-day query loop get_available_schedules used before the slot engine, over in-memory rows."""
+    dates = []
+    while date_from <= date_to:
+        for sh in [s for s in schedules if s["day_of_week"] == date_from.weekday() + 1]:
+            submit_exists = any(submit["schedule_id"] == sh["_id"] and submit["date"].date() == date_from.date()
+                                for submit in submits)
+            if not submit_exists:
+                service_start_date = datetime(date_from.year, date_from.month, date_from.day, sh["time"].hour,
+                                              sh["time"].minute, sh["time"].second)
+                if service_start_date >= now:
+                    service_end_date = service_start_date + timedelta(minutes=service["duration"])
+                    dates.append({
+                        "text": service_start_date.strftime("%H:%M") + " " + service["name"],
+                        "start": service_start_date.strftime("%Y-%m-%dT%H:%M:%S"),
+                        "end": service_end_date.strftime("%Y-%m-%dT%H:%M:%S"),
+                        "backColor": service["label_color"]
+                    })
+        date_from += timedelta(days=1)
+    return dates
+
+
+class SlotEngineTests(SimpleTestCase):
+    def setUp(self):
+        self.engine = SlotEngine()
+        self.service = {"_id": ObjectId(), "name": "Wash", "duration": 90, "label_color": "#ff0000"}
+        self.schedules = [
+            {"_id": str(ObjectId()), "day_of_week": day, "time": slot_time}
+            for day in range(1, 8) for slot_time in (time(9), time(13, 30), time(17, 15))
+        ]
+
+    def new_available_schedules(self, submits, day_from, day_to, now):
+        week = {str(self.service["_id"]): {}}
+        for schedule in self.schedules:
+            week[str(self.service["_id"])].setdefault(schedule["day_of_week"], []).append(
+                (schedule["_id"], schedule["time"]))
+        taken = {(submit["schedule_id"], submit["date"].date()) for submit in submits}
+        return [self.engine.format_slot(start, service)
+                for _, slots in self.engine.iter_days([self.service], week, taken, day_from, day_to, now)
+                for start, service in slots]
+
+    def assert_same_as_old(self, submits, date_from, date_to, now):
+        self.assertEqual(self.new_available_schedules(submits, date_from.date(), date_to.date(), now),
+                         old_available_schedules(self.service, self.schedules, submits, date_from, date_to, now))
+
+    def test_free_week(self):
+        self.assert_same_as_old([], datetime(2024, 3, 4), datetime(2024, 3, 10), datetime(2024, 3, 1))
+
+    def test_taken_slots_are_skipped(self):
+        submits = [
+            {"schedule_id": self.schedules[0]["_id"], "date": datetime(2024, 3, 4, 9)},
+            {"schedule_id": self.schedules[4]["_id"], "date": datetime(2024, 3, 5, 13, 30)},
+            # the same schedule a week later does not block this week
+            {"schedule_id": self.schedules[2]["_id"], "date": datetime(2024, 3, 11, 17, 15)},
+        ]
+        self.assert_same_as_old(submits, datetime(2024, 3, 4), datetime(2024, 3, 10), datetime(2024, 3, 1))
+
+    def test_past_slots_are_skipped(self):
+        self.assert_same_as_old([], datetime(2024, 3, 4), datetime(2024, 3, 6), datetime(2024, 3, 5, 13, 30))
+
+    def test_range_across_months(self):
+        self.assert_same_as_old([], datetime(2024, 2, 26), datetime(2024, 3, 27), datetime(2024, 2, 1))
+
+    def test_days_without_schedules(self):
+        days = list(self.engine.iter_days([self.service], {str(self.service["_id"]): {3: [("s", time(9))]}}, set(),
+                                          date(2024, 3, 4), date(2024, 3, 6), datetime(2024, 3, 1)))
+        self.assertEqual([day for day, _ in days], [date(2024, 3, 4), date(2024, 3, 5), date(2024, 3, 6)])
+        self.assertEqual([len(slots) for _, slots in days], [0, 0, 1])
+
+
+class KeysetCursorTests(SimpleTestCase):
+    def test_round_trip(self):
+        position = (datetime(2024, 3, 4, 9, 30, 15, 120000), ObjectId())
+        self.assertEqual(decode_keyset_cursor(encode_keyset_cursor(*position)), position)
+
+    def test_cursor_is_url_safe(self):
+        cursor = encode_keyset_cursor(datetime(2024, 3, 4, 9, 30), ObjectId())
+        self.assertNotRegex(cursor, r"[+/]")
+
+    def test_invalid_cursor(self):
+        for cursor in ("!!!", "bm90LWEtY3Vyc29y", encode_keyset_cursor(datetime(2024, 3, 4), ObjectId())[:-8],
+                       "MjAyNC0wMy0wNHxub3QtYW4taWQ=", "é"):
+            with self.subTest(cursor=cursor):
+                with self.assertRaises(ServiceException) as raised:
+                    decode_keyset_cursor(cursor)
+                self.assertEqual(raised.exception.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+SAMPLE_DATA = {
+    "id": "66fae8cc11451b11b5895cea",
+    "count": 3,
+    "price": 49.5,
+    "amount": Decimal("12.30"),
+    "active": True,
+    "missing": None,
+    "name": "Čistenie interiéru",
+    "separator": "a\u2028b\u2029c",
+    "naive": datetime(2024, 3, 4, 9, 30, 15, 123456),
+    "utc": datetime(2024, 3, 4, 9, 30, 15, 123456, tzinfo=timezone.utc),
+    "offset": datetime(2024, 3, 4, 9, 30, tzinfo=timezone(timedelta(hours=2))),
+    "day": date(2024, 3, 4),
+    "time": time(9, 30, 0, 500),
+    "duration": timedelta(minutes=90),
+    "uuid": uuid.UUID("12345678-1234-5678-1234-567812345678"),
+    "nested": [{"a": 1, "b": [1, 2, {"c": ""}]}, [], {}],
+    1: "int key",
+}
+
+
+class RendererTests(SimpleTestCase):
+    def test_matches_drf_renderer(self):
+        self.assertEqual(ORJSONRenderer().render(SAMPLE_DATA), JSONRenderer().render(SAMPLE_DATA))
+
+    def test_object_id(self):
+        object_id = ObjectId()
+        self.assertEqual(ORJSONRenderer().render({"_id": object_id}), f'{{"_id":"{object_id}"}}'.encode())
+
+    def test_none_renders_empty(self):
+        self.assertEqual(ORJSONRenderer().render(None), b"")
+
+
+class JSONStreamEncoderTests(SimpleTestCase):
+    def encode(self, value) -> bytes:
+        return b"".join(JSONStreamEncoder().iter_encode(value))
+
+    def test_plain_values_match_dumps(self):
+        self.assertEqual(self.encode(SAMPLE_DATA), dumps(SAMPLE_DATA))
+
+    def test_iterators_match_lists(self):
+        rows = [{"_id": ObjectId(), "n": n, "date": datetime(2024, 3, 4, n % 24)}
+                for n in range(3 * STREAM_ENCODE_BATCH + 7)]
+        self.assertEqual(self.encode({"results": iter(rows), "count": len(rows)}),
+                         dumps({"results": rows, "count": len(rows)}))
+
+    def test_empty_and_nested_iterators(self):
+        self.assertEqual(self.encode({"a": iter([]), "b": iter([iter([1, 2]), iter([])])}),
+                         dumps({"a": [], "b": [[1, 2], []]}))
+
+    def test_chunks_join_to_the_same_output(self):
+        rows = [{"text": "x" * 200, "n": n} for n in range(1000)]
+        self.assertEqual(b"".join(JSONStreamEncoder().iter_chunks(iter(rows))), dumps(rows))
+
+
+class ByteRangeTests(SimpleTestCase):
+    def test_ranges(self):
+        cases = [
+            ("bytes=0-99", (0, 99)),
+            ("bytes=100-", (100, 999)),
+            ("bytes=-100", (900, 999)),
+            ("bytes=-2000", (0, 999)),
+            ("bytes=900-5000", (900, 999)),
+            ("bytes=999-999", (999, 999)),
+            (" bytes=0-0 ", (0, 0)),
+        ]
+        for header, expected in cases:
+            with self.subTest(header=header):
+                self.assertEqual(_byte_range(header, 1000), expected)
+
+    def test_whole_file(self):
+        for header in ("bytes=-", "bytes=0-1,5-6", "items=0-9", "bytes=a-b", ""):
+            with self.subTest(header=header):
+                self.assertIsNone(_byte_range(header, 1000))
+
+    def test_unsatisfiable(self):
+        for header, size in (("bytes=1000-", 1000), ("bytes=5-1", 1000), ("bytes=-0", 1000), ("bytes=0-", 0)):
+            with self.subTest(header=header, size=size):
+                with self.assertRaises(ValueError):
+                    _byte_range(header, size)
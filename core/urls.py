@@ -20,6 +20,9 @@ urlpatterns = [
     path('services/<pk>/days', views.CarServiceDaysView.as_view()),
     path('services/<pk>/available/<date_from>/<date_to>', views.CarServiceAvailableScheduleView.as_view()),
     path('services/schedule', views.CarServiceSubmitScheduleView.as_view()),
+    path('services/schedule/bulk', views.CarServiceBulkSubmitScheduleView.as_view()),
+    path('services/search/<date_from>/<date_to>', views.CarServiceFreeSlotSearchView.as_view()),
+    path('services/availability/cache-stats', views.AvailabilityCacheStatsView.as_view()),
 
     path("profile/submits", views.UserSubmitsView.as_view()),
     path("profile/submits/<submit_id>/delete", views.DeleteSubmitScheduleView.as_view()),
@@ -43,6 +46,8 @@ urlpatterns = [
     path("detailer/orders/<order_id>/set-status", views_detailer.SetSubmitStatusView.as_view()),
 
     path("detailer/analytics/<date_from>/<date_to>", views_detailer.DetailerAnalyticsView.as_view()),
+    path("detailer/analytics/revenue/<granularity>/<date_from>/<date_to>",
+         views_detailer.DetailerRevenueAnalyticsView.as_view()),
 
     path("detailer/clients", views_detailer.DetailerClientsView.as_view()),
     path("detailer/clients/<client_id>/submits", views_detailer.DetailerClientSubmitsView.as_view()),
@@ -55,6 +60,11 @@ urlpatterns = [
 
     path("detailer/invoices", views_detailer.DetailerInvoiceListAPIView.as_view()),
     path("detailer/invoices/create", views_detailer.DetailerInvoiceCreateView.as_view()),
+    path("detailer/invoices/export/<date_from>/<date_to>", views_detailer.DetailerInvoiceExportView.as_view()),
     path("detailer/invoices/<invoice_id>/download", views_detailer.DetailerInvoiceDownloadView.as_view()),
+    path("detailer/invoices/<invoice_id>/render", views_detailer.DetailerInvoiceRenderView.as_view()),
+    path("detailer/invoices/render/metrics", views_detailer.InvoiceRenderMetricsView.as_view()),
+    path("detailer/invoices/render/<job_id>", views_detailer.DetailerInvoiceRenderJobView.as_view()),
+    path("detailer/invoices/render/<job_id>/download", views_detailer.DetailerInvoiceRenderJobDownloadView.as_view()),
     path("detailer/invoices/<invoice_id>/delete", views_detailer.RemoveDetailerInvoiceView.as_view()),
 ]
@@ -1,4 +1,4 @@
-from datetime import datetime
+from datetime import datetime, timezone
 
 
 def is_correct_iso_date(date_str: str) -> bool:
@@ -9,6 +9,14 @@ def is_correct_iso_date(date_str: str) -> bool:
         return False
 
 
+def parse_naive_utc(date_str: str) -> datetime:
+    # stored dates and datetime.now() comparisons are naive UTC; an explicit offset is converted, not dropped
+    value = datetime.fromisoformat(date_str)
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
 def get_dates_diff_days(date_from: str, date_to: str) -> int | None:
     if not is_correct_iso_date(date_from) or not is_correct_iso_date(date_to):
         return
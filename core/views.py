@@ -1,18 +1,27 @@
+from collections import OrderedDict
+
 from bson import ObjectId
 from rest_framework import status
 from rest_framework.generics import ListAPIView, RetrieveAPIView, get_object_or_404, CreateAPIView
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
 from .exceptions import ServiceException
-from .models import CarService, Role, AppUser, CarServiceSchedule, Car, Employee, SubmitStatus
+from .models import CarService, AppUser, CarServiceSchedule, Car, Employee, SubmitStatus
+from .pagination import ObjectIdCursorPagination
+from .repositories import read_repository
 from .permissions import IsDetailer, IsClient
 from .serializers import UserCreateSerializer, ChangePasswordSerializer, CarServiceSerializer, \
     SubmitScheduleCreateSerializer, ProfileSerializer, AccountUpdateSerializer, CarServiceScheduleSerializer, \
-    CarSerializer, CarAddSerializer, EmployeeAddSerializer, EmployeeSerializer, SubmitStatusSerializer
+    CarSerializer, CarAddSerializer, EmployeeAddSerializer, EmployeeSerializer, SubmitStatusSerializer, \
+    serialize_catalog_row, BulkSubmitScheduleSerializer
+from .services.availability_cache import availability_cache
 from .services.car_service import CarServiceManager
+from .services.reference_data import role_registry
+from .services.view_counter import view_counter
 from .services.user_service import UserManager
+from .streaming import StreamingListMixin
 
 car_service_manager = CarServiceManager()
 user_manager = UserManager()
@@ -32,7 +41,7 @@ class RegisterAPIView(APIView):
         if user:
             return Response({"message": "User already exists!"}, status=status.HTTP_400_BAD_REQUEST)
 
-        role = Role.objects.filter(name=serialized.initial_data['role']).first()
+        role = role_registry.get_by_name(serialized.initial_data['role'])
         if not role:
             return Response({"message": "Role not found!"}, status=status.HTTP_400_BAD_REQUEST)
 
@@ -69,9 +78,19 @@ class ChangePasswordAPIView(APIView):
 class CarServiceListView(ListAPIView):
     serializer_class = CarServiceSerializer
     queryset = CarService.objects.all()
+    pagination_class = ObjectIdCursorPagination
     authentication_classes = []
     permission_classes = []
 
+    def list(self, request, *args, **kwargs):
+        rows, next_link, previous_link = self.paginator.paginate_collection(read_repository.services_page, request)
+        detailers = read_repository.users_by_ids({row.get("detailer_id") for row in rows}, ("id", "username"))
+        return Response(OrderedDict([
+            ("next", next_link),
+            ("previous", previous_link),
+            ("results", [serialize_catalog_row(row, detailers, request) for row in rows])
+        ]))
+
 
 class CarServiceDetailsView(RetrieveAPIView):
     serializer_class = CarServiceSerializer
@@ -81,12 +100,12 @@ class CarServiceDetailsView(RetrieveAPIView):
     def get_object(self):
         obj = CarService.objects.filter(_id=ObjectId(self.kwargs["pk"])).first()
         if obj:
-            obj.view_count += 1
-            obj.save()
+            view_counter.increment(obj._id)
+            obj.view_count += view_counter.pending(obj._id)
         return obj
 
 
-class CarServiceDaysView(ListAPIView):
+class CarServiceDaysView(StreamingListMixin, ListAPIView):
     serializer_class = CarServiceScheduleSerializer
     authentication_classes = []
     permission_classes = []
@@ -107,6 +126,28 @@ class CarServiceAvailableScheduleView(APIView):
             return e.get_response()
 
 
+class AvailabilityCacheStatsView(APIView):
+    permission_classes = [IsAuthenticated, IsAdminUser]
+
+    def get(self, request):
+        return Response(availability_cache.stats(), status=status.HTTP_200_OK)
+
+
+class CarServiceFreeSlotSearchView(APIView):
+    authentication_classes = []
+    permission_classes = []
+
+    def get(self, request, date_from, date_to):
+        try:
+            result = car_service_manager.find_first_free_slots(date_from, date_to,
+                                                               request.query_params.get("max_price"),
+                                                               request.query_params.get("max_duration"),
+                                                               request.query_params.get("limit"))
+            return Response(result, status=status.HTTP_200_OK)
+        except ServiceException as e:
+            return e.get_response()
+
+
 class CarServiceSubmitScheduleView(APIView):
     def post(self, request):
         serializer = SubmitScheduleCreateSerializer(data=request.data)
@@ -122,6 +163,21 @@ class CarServiceSubmitScheduleView(APIView):
             return e.get_response()
 
 
+class CarServiceBulkSubmitScheduleView(APIView):
+    def post(self, request):
+        serializer = BulkSubmitScheduleSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        try:
+            bookings = list(serializer.validated_data.get("bookings", []))
+            if "recurrence" in serializer.validated_data:
+                bookings += car_service_manager.expand_recurrence(serializer.validated_data["recurrence"])
+            result = car_service_manager.submit_schedules_bulk(request.user.id, bookings)
+            return Response(result, status=status.HTTP_200_OK)
+        except ServiceException as e:
+            return e.get_response()
+
+
 class UserSubmitsView(APIView):
     def get(self, request):
         try:
@@ -170,7 +226,7 @@ class UserRoleView(APIView):
             return e.get_response()
 
 
-class CarsView(ListAPIView):
+class CarsView(StreamingListMixin, ListAPIView):
     permission_classes = [IsAuthenticated, IsClient]
     serializer_class = CarSerializer
 
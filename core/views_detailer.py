@@ -1,8 +1,8 @@
 from bson import ObjectId
-from django.http import HttpResponse
+from django.http import FileResponse, StreamingHttpResponse
 from rest_framework import status
 from rest_framework.generics import ListAPIView, CreateAPIView, DestroyAPIView
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
@@ -12,6 +12,8 @@ from .permissions import IsDetailer
 from .serializers import CarServiceSerializer, \
     EmployeeAddSerializer, EmployeeSerializer, SubmitStatusSerializer, InvoiceSerializer
 from .services.car_service import CarServiceManager
+from .streaming import StreamingJSONResponse, StreamingListMixin
+from .services.invoice_render_pool import invoice_render_pool
 
 car_service_manager = CarServiceManager()
 
@@ -41,16 +43,26 @@ class DetailerAnalyticsView(DetailerGetBaseAPIView):
         return Response(result, status=status.HTTP_200_OK)
 
 
+class DetailerRevenueAnalyticsView(DetailerGetBaseAPIView):
+    def get_data(self, request, **kwargs):
+        result = car_service_manager.get_revenue_analytics(self.request.user.id, kwargs["granularity"],
+                                                           kwargs["date_from"], kwargs["date_to"])
+        return Response(result, status=status.HTTP_200_OK)
+
+
 class DetailerClientsView(DetailerGetBaseAPIView):
     def get_data(self, request, **kwargs):
-        result = car_service_manager.get_detailer_clients(self.request.user.id)
+        params = {key: request.query_params.get(key) for key in ("sort", "page", "limit")}
+        result = car_service_manager.get_detailer_clients(self.request.user.id, params)
         return Response(result, status=status.HTTP_200_OK)
 
 
 class OrdersListView(DetailerGetBaseAPIView):
     def get_data(self, request, **kwargs):
-        result = car_service_manager.get_all_orders(self.request.user.id)
-        return Response(result, status=status.HTTP_200_OK)
+        filters = {key: request.query_params.get(key) for key in
+                   ("date_from", "date_to", "status_id", "employee_id", "service_id", "cursor", "limit")}
+        result = car_service_manager.get_all_orders(self.request.user.id, filters)
+        return StreamingJSONResponse(result, status=status.HTTP_200_OK)
 
 
 class RemoveEmployeeView(APIView):
@@ -75,7 +87,7 @@ class AttachEmployeeView(APIView):
             return e.get_response()
 
 
-class SubmitStatusListView(ListAPIView):
+class SubmitStatusListView(StreamingListMixin, ListAPIView):
     permission_classes = [IsAuthenticated, IsDetailer]
     queryset = SubmitStatus.objects.all()
     serializer_class = SubmitStatusSerializer
@@ -103,7 +115,7 @@ class AddEmployeeView(APIView):
         return Response({"message": "Done"}, status=status.HTTP_200_OK)
 
 
-class EmployeesView(ListAPIView):
+class EmployeesView(StreamingListMixin, ListAPIView):
     permission_classes = [IsAuthenticated, IsDetailer]
     serializer_class = EmployeeSerializer
 
@@ -122,7 +134,7 @@ class AddServiceView(APIView):
             return e.get_response()
 
 
-class DetailerServicesListView(ListAPIView):
+class DetailerServicesListView(StreamingListMixin, ListAPIView):
     permission_classes = [IsAuthenticated, IsDetailer]
     serializer_class = CarServiceSerializer
 
@@ -133,7 +145,7 @@ class DetailerServicesListView(ListAPIView):
 class DetailerClientSubmitsView(DetailerGetBaseAPIView):
     def get_data(self, request, **kwargs):
         result = car_service_manager.get_detailer_client_submits(self.request.user.id, kwargs["client_id"])
-        return Response(result, status=status.HTTP_200_OK)
+        return StreamingJSONResponse(result, status=status.HTTP_200_OK)
 
 
 class DetailerInvoiceCreateView(APIView):
@@ -150,12 +162,51 @@ class DetailerInvoiceCreateView(APIView):
 class DetailerInvoiceDownloadView(DetailerGetBaseAPIView):
     def get_data(self, request, **kwargs):
         file, filename = car_service_manager.get_invoice_file(self.request.user.id, kwargs["invoice_id"])
-        response = HttpResponse(file, content_type="application/pdf")
+        return FileResponse(file, as_attachment=True, filename=filename, content_type="application/pdf")
+
+
+class DetailerInvoiceRenderView(APIView):
+    permission_classes = [IsAuthenticated, IsDetailer]
+
+    def post(self, request, invoice_id):
+        try:
+            result = car_service_manager.request_invoice_render(request.user.id, invoice_id)
+            return Response(result, status=status.HTTP_202_ACCEPTED)
+        except ServiceException as e:
+            return e.get_response()
+
+
+class DetailerInvoiceRenderJobView(DetailerGetBaseAPIView):
+    def get_data(self, request, **kwargs):
+        result = car_service_manager.get_render_job(self.request.user.id, kwargs["job_id"])
+        return Response(result, status=status.HTTP_200_OK)
+
+
+class DetailerInvoiceRenderJobDownloadView(DetailerGetBaseAPIView):
+    def get_data(self, request, **kwargs):
+        file, filename = car_service_manager.get_render_job_file(self.request.user.id, kwargs["job_id"])
+        if file is None:
+            return Response(filename, status=status.HTTP_202_ACCEPTED)
+        return FileResponse(file, as_attachment=True, filename=filename, content_type="application/pdf")
+
+
+class InvoiceRenderMetricsView(APIView):
+    permission_classes = [IsAuthenticated, IsAdminUser]
+
+    def get(self, request):
+        return Response(invoice_render_pool.metrics(), status=status.HTTP_200_OK)
+
+
+class DetailerInvoiceExportView(DetailerGetBaseAPIView):
+    def get_data(self, request, **kwargs):
+        stream, filename = car_service_manager.export_invoices(self.request.user.id, kwargs["date_from"],
+                                                               kwargs["date_to"])
+        response = StreamingHttpResponse(stream, content_type="application/zip")
         response["Content-Disposition"] = f'attachment; filename="{filename}"'
         return response
 
 
-class DetailerInvoiceListAPIView(ListAPIView):
+class DetailerInvoiceListAPIView(StreamingListMixin, ListAPIView):
     permission_classes = [IsAuthenticated, IsDetailer]
     serializer_class = InvoiceSerializer
 
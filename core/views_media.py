@@ -0,0 +1,112 @@
+import mimetypes
+import os
+import re
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import Http404, HttpResponse, StreamingHttpResponse, FileResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe
+from django.views.decorators.http import require_safe
+
+from .storage import is_hashed_name
+
+RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+# content-hashed names never change content; anything else must be revalidated
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "public, max-age=0, must-revalidate"
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+def _iter_range(path: str, start: int, length: int):
+    with open(path, "rb") as file:
+        file.seek(start)
+        while length > 0:
+            chunk = file.read(min(STREAM_CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+def _byte_range(header: str, size: int) -> tuple[int, int] | None:
+    """(start, end) inclusive for a single satisfiable "bytes=" range, None to send the whole file."""
+    match = RANGE.match(header.strip())
+    if not match or match.groups() == ("", ""):
+        return None
+    first, last = match.groups()
+    if first:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    else:
+        start = max(size - int(last), 0)
+        end = size - 1
+    if start > end or start >= size:
+        raise ValueError("unsatisfiable range")
+    return start, end
+
+
+def _if_range_matches(if_range: str | None, etag: str, last_modified: int) -> bool:
+    if not if_range:
+        return True
+    if if_range.startswith('"') or if_range.startswith("W/"):
+        return if_range == etag
+    return parse_http_date_safe(if_range) == last_modified
+
+
+@require_safe
+def serve_media(request, path: str):
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404("Media file not found")
+    try:
+        stat = os.stat(full_path)
+    except OSError:
+        raise Http404("Media file not found")
+    if not os.path.isfile(full_path):
+        raise Http404("Media file not found")
+
+    etag = f'"{stat.st_size:x}-{stat.st_mtime_ns:x}"'
+    last_modified = int(stat.st_mtime)
+    headers = {
+        "ETag": etag,
+        "Last-Modified": http_date(last_modified),
+        "Cache-Control": IMMUTABLE_CACHE_CONTROL if is_hashed_name(path) else REVALIDATE_CACHE_CONTROL,
+        "Accept-Ranges": "bytes",
+    }
+
+    not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if not_modified is not None:
+        for header, value in headers.items():
+            not_modified.headers.setdefault(header, value)
+        return not_modified
+
+    content_type, encoding = mimetypes.guess_type(full_path)
+    content_type = content_type or "application/octet-stream"
+
+    byte_range = None
+    range_header = request.headers.get("Range")
+    if range_header and _if_range_matches(request.headers.get("If-Range"), etag, last_modified):
+        try:
+            byte_range = _byte_range(range_header, stat.st_size)
+        except ValueError:
+            response = HttpResponse(status=416)
+            response.headers["Content-Range"] = f"bytes */{stat.st_size}"
+            response.headers.update(headers)
+            return response
+
+    if byte_range is None:
+        response = FileResponse(open(full_path, "rb"), content_type=content_type)
+    else:
+        start, end = byte_range
+        response = StreamingHttpResponse(_iter_range(full_path, start, end - start + 1), status=206,
+                                         content_type=content_type)
+        response.headers["Content-Range"] = f"bytes {start}-{end}/{stat.st_size}"
+        response.headers["Content-Length"] = str(end - start + 1)
+    if encoding:
+        response.headers["Content-Encoding"] = encoding
+    response.headers.update(headers)
+    return response
+